@@ -1,7 +1,7 @@
 from http import HTTPStatus
 
-import requests
 from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
 from django.db.utils import IntegrityError
 from rest_framework.decorators import action
@@ -9,19 +9,22 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.request import Request
 from rest_framework.response import Response
 
-from api.base import BaseAPI
+from api.base import BaseAPI, query_budget
 from api.methods import delete_user_token_key, get_token_key
+from api.passwords import new_user, passwords
 from api.serializers.accounts import (
     GoogleAuthSerializer,
     LoginSerializer,
     UserSerializer,
 )
+from api.social import get_userinfo, verify_google_id_token
 from core.exceptions import APIAccessDenied, APIException
 
 
 class AccountAPI(BaseAPI):
     REQUIRES_AUTH = False
 
+    @query_budget(0)
     def list(self, request: Request):
         if request.user.is_anonymous:
             raise APIAccessDenied()
@@ -33,14 +36,16 @@ class AccountAPI(BaseAPI):
         )
 
     @action(detail=False, methods=["POST"], url_path="register")
+    @query_budget(4)
     def register(self, request):
         data = LoginSerializer(data=request.data)
         data.is_valid(raise_exception=True)
 
+        with passwords.slot():
+            encoded = make_password(data.validated_data["password"])
+
         try:
-            email = data.validated_data.get("email")
-            user = User.objects.create_user(email=email, username=email)
-            user.set_password(data.validated_data.get("password"))
+            user = new_user(email=data.validated_data["email"], encoded=encoded)
             user.save()
 
             return Response(data={"token": get_token_key(user).key})
@@ -48,14 +53,18 @@ class AccountAPI(BaseAPI):
             raise APIException(code="user_exist", message="User already exist.")
 
     @action(detail=False, methods=["POST"], url_path="login")
+    # Saving an upgraded password hash also invalidates the user's tokens
+    @query_budget(4)
     def login(self, request):
         data = LoginSerializer(data=request.data)
         data.is_valid(raise_exception=True)
 
-        user = authenticate(
-            username=data.validated_data["email"],
-            password=data.validated_data["password"],
-        )
+        with passwords.slot():
+            user = authenticate(
+                request,
+                username=data.validated_data["email"],
+                password=data.validated_data["password"],
+            )
 
         if user:
             return Response({"token": get_token_key(user).key})
@@ -66,31 +75,31 @@ class AccountAPI(BaseAPI):
         )
 
     @action(detail=False, methods=["POST"], url_path="google-auth")
+    @query_budget(5)
     def google_auth(self, request):
         req_data = GoogleAuthSerializer(data=request.data)
         req_data.is_valid(raise_exception=True)
 
-        access_token = req_data.validated_data["access_token"]
-
-        # Get user info
-        response = requests.get(
-            "https://www.googleapis.com/oauth2/v1/userinfo",
-            headers={
-                "Authorization": f"Bearer {access_token}",
-                "Accept": "application/json",
-            },
-        )
-        if response.ok:
-            data = response.json()
-            email = data["email"]
+        # ID tokens are verified locally, access tokens cost a userinfo call
+        if id_token := req_data.validated_data.get("id_token"):
+            userinfo = verify_google_id_token(id_token)
+            verified = userinfo and userinfo.get("email_verified")
         else:
+            userinfo = get_userinfo("google", req_data.validated_data["access_token"])
+            # The v1 userinfo endpoint calls it verified_email
+            verified = userinfo and (
+                userinfo.get("verified_email") or userinfo.get("email_verified")
+            )
+
+        if not verified or not userinfo.get("email"):
             raise ValidationError({"message": "Invalid credential."})
 
-        user, _ = User.objects.get_or_create(username=email)
+        user, _ = User.objects.get_or_create(username=userinfo["email"])
 
-        return Response({"token": get_token_key(user=user)})
+        return Response({"token": get_token_key(user=user).key})
 
     @action(detail=False, methods=["GET"], url_path="logout")
+    @query_budget(2)
     def logout(self, request):
         if request.user.is_anonymous:
             raise APIAccessDenied()
@@ -0,0 +1,45 @@
+from django.contrib.auth import aauthenticate
+from django.db.utils import IntegrityError
+
+from api.async_base import AsyncBaseAPI
+from api.methods import aget_token_key
+from api.passwords import new_user, passwords
+from api.serializers.accounts import LoginSerializer
+from core.exceptions import APIException
+
+
+class AsyncLoginAPI(AsyncBaseAPI):
+    REQUIRES_AUTH = False
+
+    async def post(self, request):
+        data = LoginSerializer(data=self.get_data(request))
+        data.is_valid(raise_exception=True)
+
+        user = await aauthenticate(
+            request,
+            username=data.validated_data["email"],
+            password=data.validated_data["password"],
+        )
+        if user is None:
+            raise APIException(code="invalid_credential", message="Invalid credential.")
+
+        return self.render({"token": (await aget_token_key(user)).key})
+
+
+class AsyncRegisterAPI(AsyncBaseAPI):
+    REQUIRES_AUTH = False
+
+    async def post(self, request):
+        data = LoginSerializer(data=self.get_data(request))
+        data.is_valid(raise_exception=True)
+
+        user = new_user(
+            email=data.validated_data["email"],
+            encoded=await passwords.amake(data.validated_data["password"]),
+        )
+        try:
+            await user.asave()
+        except IntegrityError:
+            raise APIException(code="user_exist", message="User already exist.")
+
+        return self.render({"token": (await aget_token_key(user)).key})
@@ -0,0 +1,110 @@
+from http import HTTPStatus
+from operator import itemgetter
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from api.async_base import AsyncBaseAPI
+from api.etags import if_match, if_none_match, instance_etag
+from api.methods import get_requested_fields
+from api.pagination import apaginate_by_uid, is_paginated
+from api.serializers.todos import TodoSerializer
+from core.exceptions import APINotFound, APIPreconditionFailed
+from todos.models import Todo
+
+
+class AsyncTodoListAPI(AsyncBaseAPI):
+    async def get(self, request):
+        fields = get_requested_fields(request.GET, TodoSerializer.Meta.fields)
+        queryset = TodoSerializer.values_queryset(
+            Todo.objects.filter(user=request.user), fields
+        )
+
+        if not is_paginated(request.GET):
+            rows = [row async for row in queryset]
+            return self.render(TodoSerializer.serialize_values(rows, fields))
+
+        rows, next_cursor = await apaginate_by_uid(
+            queryset, request.GET, get_uid=itemgetter(0)
+        )
+        return self.render(
+            {
+                "results": TodoSerializer.serialize_values(rows, fields),
+                "next": next_cursor,
+            }
+        )
+
+    async def post(self, request):
+        data = TodoSerializer(data=self.get_data(request))
+        data.is_valid(raise_exception=True)
+        # The generation bump shares the insert's transaction
+        instance = await sync_to_async(transaction.atomic(Todo.objects.create))(
+            user=request.user, **data.validated_data
+        )
+
+        return self.render(
+            TodoSerializer(instance=instance).data,
+            headers={"ETag": instance_etag(instance)},
+        )
+
+
+class AsyncTodoDetailAPI(AsyncBaseAPI):
+    async def _get_instance(self, request, pk):
+        try:
+            return await Todo.objects.aget(uid=pk, user=request.user)
+        except Todo.DoesNotExist:
+            raise APINotFound()
+
+    def _get_for_write(self, request, pk):
+        # Locks the row so no other write lands between If-Match and ours
+        try:
+            instance = Todo.objects.select_for_update().get(uid=pk, user=request.user)
+        except Todo.DoesNotExist:
+            raise APINotFound()
+
+        if not if_match(request, instance_etag(instance)):
+            raise APIPreconditionFailed(
+                message="Todo was modified, fetch it again before writing."
+            )
+
+        return instance
+
+    @transaction.atomic
+    def _update(self, request, pk, data):
+        data = TodoSerializer(
+            instance=self._get_for_write(request, pk), data=data, partial=True
+        )
+        data.is_valid(raise_exception=True)
+        return data.save()
+
+    @transaction.atomic
+    def _delete(self, request, pk):
+        self._get_for_write(request, pk).delete()
+
+    async def get(self, request, pk):
+        instance = await self._get_instance(request, pk)
+
+        etag = instance_etag(instance)
+        if if_none_match(request, etag):
+            return self.render(status=HTTPStatus.NOT_MODIFIED, headers={"ETag": etag})
+
+        return self.render(
+            TodoSerializer(instance=instance).data, headers={"ETag": etag}
+        )
+
+    async def put(self, request, pk):
+        instance = await sync_to_async(self._update)(
+            request, pk, self.get_data(request)
+        )
+
+        return self.render(
+            TodoSerializer(instance=instance).data,
+            headers={"ETag": instance_etag(instance)},
+        )
+
+    patch = put
+
+    async def delete(self, request, pk):
+        await sync_to_async(self._delete)(request, pk)
+
+        return self.render(status=HTTPStatus.NO_CONTENT)
@@ -0,0 +1,39 @@
+from secrets import compare_digest
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+
+from api.base import BaseAPI, query_budget
+from api.methods import get_user_by_token
+from core.exceptions import APIForbidden
+from core.metrics import registry
+
+
+class MetricsAPI(BaseAPI):
+    REQUIRES_AUTH = False
+
+    # Scrapers send METRICS_TOKEN, which isn't a user token
+    authentication_classes = []
+
+    def _is_allowed(self, request) -> bool:
+        header = request.META.get("HTTP_AUTHORIZATION", "")
+        token = header.split(" ")[-1]
+        if settings.METRICS_TOKEN and compare_digest(token, settings.METRICS_TOKEN):
+            return True
+
+        try:
+            resolved = get_user_by_token(token_key=header)
+        except AuthenticationFailed:
+            return False
+        return bool(resolved and resolved[0].is_superuser)
+
+    @query_budget(1)
+    def list(self, request: Request):
+        if not self._is_allowed(request):
+            raise APIForbidden()
+
+        return HttpResponse(
+            registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
@@ -1,51 +1,348 @@
+from datetime import timedelta
 from http import HTTPStatus
+from operator import itemgetter
 
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from api.base import BaseAPI
-from api.serializers.todos import TodoSerializer
-from todos.models import Todo
+from api.base import BaseAPI, query_budget
+from api.etags import if_match, if_none_match, instance_etag, list_etag
+from api.exports import export_todos
+from api.pagination import (
+    decode_timestamp_cursor,
+    encode_timestamp_cursor,
+    is_paginated,
+    paginate_by_uid,
+)
+from api.response_cache import todo_list_cache
+from api.serializers.todos import BulkOperationSerializer, TodoSerializer
+from core.exceptions import APIException, APIGone, APIPreconditionFailed
+from todos import broadcast
+from todos.models import Todo, TodoGeneration, TodoTombstone
+
+
+def _bulk_result(op, uid, status, **kwargs):
+    return {"op": op, "id": uid, "status": status, **kwargs}
+
+
+def _bulk_error(op, uid, status, code, error):
+    return _bulk_result(op, uid, status, code=code, error=error)
 
 
 class TodoAPI(BaseAPI):
+    @query_budget(2)
     def list(self, request):
-        serializer = TodoSerializer(Todo.objects.filter(user=request.user), many=True)
+        fields = self.get_requested_fields(allowed=TodoSerializer.Meta.fields)
+
+        # Taken before querying, a write in between only costs a full response
+        etag = list_etag(request.user.id, request.query_params)
+        if if_none_match(request, etag):
+            return Response(status=HTTPStatus.NOT_MODIFIED, headers={"ETag": etag})
+
+        def render():
+            queryset = Todo.objects.filter(user=request.user)
+            if settings.TODO_FAST_SERIALIZER:
+                return self._render_values(queryset, fields)
+
+            if fields:
+                # uid is always needed for the pagination cursor
+                queryset = queryset.only("uid", *TodoSerializer.get_sources(fields))
 
-        return Response(serializer.data)
+            if not is_paginated(request.query_params):
+                return list(TodoSerializer(queryset, many=True, fields=fields).data)
 
+            todos, next_cursor = paginate_by_uid(queryset, request.query_params)
+            return {
+                "results": list(TodoSerializer(todos, many=True, fields=fields).data),
+                "next": next_cursor,
+            }
+
+        # The ETag already covers the user, their generation and the query
+        data = todo_list_cache.get_or_set(etag.strip('"'), render)
+        return Response(data, headers={"ETag": etag})
+
+    def _render_values(self, queryset, fields):
+        queryset = TodoSerializer.values_queryset(queryset, fields)
+        if not is_paginated(self.request.query_params):
+            return TodoSerializer.serialize_values(queryset, fields)
+
+        rows, next_cursor = paginate_by_uid(
+            queryset, self.request.query_params, get_uid=itemgetter(0)
+        )
+        return {
+            "results": TodoSerializer.serialize_values(rows, fields),
+            "next": next_cursor,
+        }
+
+    @query_budget(1)
     def retrieve(self, request, pk):
         instance = self.get_instance(
             model=Todo,
             pk=pk,
+            user=request.user,
         )
-        return Response(TodoSerializer(instance=instance).data)
 
+        etag = instance_etag(instance)
+        if if_none_match(request, etag):
+            return Response(status=HTTPStatus.NOT_MODIFIED, headers={"ETag": etag})
+
+        return Response(TodoSerializer(instance=instance).data, headers={"ETag": etag})
+
+    @transaction.atomic
+    @query_budget(2)
     def create(self, request):
         data = TodoSerializer(data=request.data)
         data.is_valid(raise_exception=True)
         data.save(user=request.user)
 
-        return Response(data.data)
+        return Response(data.data, headers={"ETag": instance_etag(data.instance)})
+
+    def _get_for_write(self, request, pk):
+        instance = self.get_instance(
+            model=Todo,
+            pk=pk,
+            for_update=True,
+            user=request.user,
+        )
+        if not if_match(request, instance_etag(instance)):
+            raise APIPreconditionFailed(
+                message="Todo was modified, fetch it again before writing."
+            )
+
+        return instance
 
+    @transaction.atomic
+    @query_budget(3)
     def update(self, request, *args, **kwargs):
         data = TodoSerializer(
-            instance=self.get_instance(
-                model=Todo,
-                pk=kwargs.get("pk"),
-            ),
+            instance=self._get_for_write(request, pk=kwargs.get("pk")),
             data=request.data,
             partial=True,
         )
         data.is_valid(raise_exception=True)
         data.save()
 
-        return Response(TodoSerializer(instance=data.instance).data)
+        return Response(
+            TodoSerializer(instance=data.instance).data,
+            headers={"ETag": instance_etag(data.instance)},
+        )
 
+    @transaction.atomic
+    @query_budget(4)
     def delete(self, request, pk):
-        instance = self.get_instance(
-            model=Todo,
-            pk=pk,
-        )
+        instance = self._get_for_write(request, pk=pk)
         instance.delete()
 
         return Response(status=HTTPStatus.NO_CONTENT)
+
+    @action(detail=False, methods=["GET"], url_path="export")
+    # Rows are queried while the response streams, after the check
+    @query_budget(0)
+    def export(self, request):
+        fields = self.get_requested_fields(allowed=TodoSerializer.Meta.fields)
+        return export_todos(
+            request,
+            Todo.objects.filter(user=request.user),
+            output=request.query_params.get("output", "jsonl"),
+            fields=fields,
+        )
+
+    @action(detail=False, methods=["GET"], url_path="changes")
+    @query_budget(2)
+    def changes(self, request):
+        """
+        Todos updated and deleted since the ``since`` cursor, each list
+        oldest change first. Rows are read from ``TODO_CHANGES_OVERLAP``
+        seconds before the cursor, so a write that commits late with an
+        older timestamp isn't skipped, and clients must dedupe the results
+        by id.
+        """
+        since = request.query_params.get("since")
+        todos = Todo.objects.filter(user=request.user)
+        tombstones = TodoTombstone.objects.none()
+        # A full load can't return a cursor past the start of its own read
+        started = now()
+
+        if since:
+            since = decode_timestamp_cursor(since)
+            retention = timedelta(days=settings.TODO_TOMBSTONE_RETENTION_DAYS)
+            if since < now() - retention:
+                # Deletes before the retention window may be gone already
+                raise APIGone(
+                    code="cursor_expired", message="Cursor expired, reload all todos."
+                )
+
+            start = since - timedelta(seconds=settings.TODO_CHANGES_OVERLAP)
+            todos = todos.filter(updated_on__gte=start)
+            tombstones = TodoTombstone.objects.filter(
+                user=request.user, created_on__gte=start
+            )
+
+        # Oldest first, which is also the order of the indexes they're read by
+        todos = list(todos.order_by("updated_on"))
+        tombstones = list(
+            tombstones.order_by("created_on").values_list("todo_uid", "created_on")
+        )
+
+        timestamps = [todo.updated_on for todo in todos]
+        timestamps += [created_on for _, created_on in tombstones]
+        # Overlapping rows can't move it back, without changes it stays put
+        if since:
+            timestamps.append(since)
+        cursor = max(timestamps, default=started)
+
+        return Response(
+            {
+                "updated": TodoSerializer(todos, many=True).data,
+                "deleted": [uid for uid, _ in tombstones],
+                "cursor": encode_timestamp_cursor(cursor),
+            }
+        )
+
+    @action(detail=False, methods=["POST"], url_path="bulk")
+    @query_budget(8)
+    def bulk(self, request):
+        operations = request.data
+        if not isinstance(operations, list):
+            raise APIException(
+                code="invalid_bulk", message="Expected a list of operations."
+            )
+        if len(operations) > settings.TODO_BULK_MAX_ITEMS:
+            raise APIException(
+                code="too_many_operations",
+                message=f"At most {settings.TODO_BULK_MAX_ITEMS} operations allowed.",
+            )
+
+        results = [None] * len(operations)
+        creates, updates, deletes = [], [], []
+        for index, operation in enumerate(operations):
+            header = BulkOperationSerializer(data=operation)
+            if not header.is_valid():
+                results[index] = _bulk_error(
+                    operation.get("op") if isinstance(operation, dict) else None,
+                    operation.get("id") if isinstance(operation, dict) else None,
+                    HTTPStatus.BAD_REQUEST,
+                    "invalid_operation",
+                    header.errors,
+                )
+                continue
+
+            op, uid = header.validated_data["op"], header.validated_data.get("id")
+            if op == "create":
+                data = TodoSerializer(data=operation)
+                if data.is_valid():
+                    todo = Todo(user=request.user, **data.validated_data)
+                    creates.append((index, todo))
+                else:
+                    results[index] = _bulk_error(
+                        op, uid, HTTPStatus.BAD_REQUEST, "invalid", data.errors
+                    )
+            elif op == "update":
+                updates.append((index, {**operation, "id": uid}))
+            else:
+                deletes.append((index, {**operation, "id": uid}))
+
+        changes = []
+        with transaction.atomic(), broadcast.muted():
+            # Client generated ids must not clash with existing todos
+            taken = set(
+                Todo.objects.filter(
+                    uid__in=[todo.uid for _, todo in creates]
+                ).values_list("uid", flat=True)
+            )
+            new_todos = []
+            for index, todo in creates:
+                if todo.uid in taken:
+                    results[index] = _bulk_error(
+                        "create", todo.uid, HTTPStatus.CONFLICT, "conflict", "Conflict."
+                    )
+                    continue
+
+                taken.add(todo.uid)
+                new_todos.append(todo)
+                results[index] = _bulk_result(
+                    "create", todo.uid, HTTPStatus.OK, data=TodoSerializer(todo).data
+                )
+                changes.append(broadcast.change_event("todo_created", todo))
+
+            Todo.objects.bulk_create(new_todos)
+
+            instances = (
+                Todo.objects.select_for_update()
+                .filter(user=request.user)
+                .in_bulk(
+                    [operation["id"] for _, operation in updates + deletes],
+                    field_name="uid",
+                )
+            )
+
+            timestamp = now()
+            updated, update_fields = {}, {"updated_on"}
+            for index, operation in updates:
+                uid = operation["id"]
+                instance = instances.get(uid)
+                if instance is None:
+                    results[index] = _bulk_error(
+                        "update", uid, HTTPStatus.NOT_FOUND, "not_found", "Not found."
+                    )
+                    continue
+
+                data = TodoSerializer(instance=instance, data=operation, partial=True)
+                if not data.is_valid():
+                    results[index] = _bulk_error(
+                        "update", uid, HTTPStatus.BAD_REQUEST, "invalid", data.errors
+                    )
+                    continue
+
+                # The id addresses the todo, it can't be changed here
+                data.validated_data.pop("uid", None)
+                for attr, value in data.validated_data.items():
+                    setattr(instance, attr, value)
+                    update_fields.add(attr)
+
+                # bulk_update() skips auto_now fields
+                instance.updated_on = timestamp
+                updated[uid] = instance
+                results[index] = _bulk_result(
+                    "update", uid, HTTPStatus.OK, data=TodoSerializer(instance).data
+                )
+
+            Todo.objects.bulk_update(updated.values(), fields=sorted(update_fields))
+
+            deleted = {}
+            for index, operation in deletes:
+                uid = operation["id"]
+                instance = instances.get(uid)
+                if instance is None or uid in deleted:
+                    results[index] = _bulk_error(
+                        "delete", uid, HTTPStatus.NOT_FOUND, "not_found", "Not found."
+                    )
+                    continue
+
+                deleted[uid] = instance
+                results[index] = _bulk_result("delete", uid, HTTPStatus.NO_CONTENT)
+
+            Todo.objects.filter(pk__in=[todo.pk for todo in deleted.values()]).delete()
+            TodoTombstone.objects.bulk_create(
+                [
+                    TodoTombstone(user=request.user, todo_uid=uid)
+                    for uid in deleted.keys()
+                ]
+            )
+            if new_todos or updated or deleted:
+                TodoGeneration.bump(request.user.id)
+
+        changes += [
+            broadcast.change_event("todo_updated", todo)
+            for uid, todo in updated.items()
+            if uid not in deleted
+        ]
+        changes += [
+            broadcast.change_event("todo_deleted", todo) for todo in deleted.values()
+        ]
+        broadcast.send_changes(request.user.id, changes)
+
+        return Response(results)
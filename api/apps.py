@@ -1,6 +1,32 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+def install_query_counter(sender, connection, **kwargs):
+    from core.metrics import count_queries
+
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
 
 
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        from api import social
+        from api.passwords import passwords
+        from api.response_cache import todo_list_cache
+        from api.token_activity import token_activity
+        from api.token_cache import token_cache
+        from core.metrics import registry
+
+        connection_created.connect(install_query_counter)
+
+        registry.register("token_cache", token_cache.stats)
+        registry.register("todo_list_cache", todo_list_cache.stats)
+        registry.register("password_hashing", passwords.stats)
+        registry.register("social_http", social.stats)
+        registry.register(
+            "token_activity", lambda: {"pending": token_activity.pending()}
+        )
@@ -0,0 +1,96 @@
+import json
+import logging
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework.renderers import JSONRenderer
+
+from api.methods import aget_user_by_token_key, sample_api_error
+from api.token_activity import token_activity
+from core.exceptions import APIAccessDenied, APIException, get_exception_status
+from core.metrics import timed
+
+log = logging.getLogger(__name__)
+
+
+class AsyncBaseAPI(View):
+    """
+    Async counterpart of BaseAPI for plain Django async views, which run on
+    the event loop under ASGI instead of going through a sync thread.
+    """
+
+    REQUIRES_AUTH = True
+
+    renderer = JSONRenderer()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Token authenticated like the DRF views, so no CSRF
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def authenticate(self, request):
+        # Don't touch the session backed middleware user, that's sync only
+        request.user, request.auth = AnonymousUser(), None
+
+        token_key = request.META.get("HTTP_AUTHORIZATION", "").split(" ")
+        if len(token_key) == 2:
+            with timed("auth"):
+                request.user, request.auth = await aget_user_by_token_key(token_key[1])
+            with timed("activity"):
+                await token_activity.arecord(request.auth)
+
+        if self.REQUIRES_AUTH and not (request.user and request.user.is_authenticated):
+            raise APIAccessDenied()
+
+    def get_data(self, request):
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError:
+            raise APIException(code="invalid_json", message="Malformed JSON.")
+
+    def render(self, data=None, status=200, headers=None):
+        content = b"" if data is None else self.renderer.render(data)
+        return HttpResponse(
+            content, status=status, headers=headers, content_type="application/json"
+        )
+
+    def handle_exception(self, exc):
+        # Same responses as BaseAPI.handle_exception and DRF
+        status = get_exception_status(exc)
+        if status is not None:
+            resp = self.render({"error": exc.message, "code": exc.code}, status)
+        elif isinstance(exc, AuthenticationFailed):
+            resp = self.render({"detail": exc.detail}, status=403)
+        elif isinstance(exc, ValidationError):
+            resp = self.render(exc.detail, status=400)
+        else:
+            resp = None
+
+        if resp is not None:
+            if sample_api_error():
+                log.info(
+                    "API error status=%s exception=%s api=%s method=%s path=%s",
+                    resp.status_code,
+                    type(exc).__name__,
+                    type(self).__name__,
+                    self.request.method,
+                    self.request.path,
+                )
+            return resp
+
+        log.exception(
+            "Exception api=%s path=%s", type(self).__name__, self.request.path
+        )
+        return self.render(
+            {"error": "Something went wrong.", "code": "unknown"}, status=500
+        )
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            await self.authenticate(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except Exception as exc:
+            return self.handle_exception(exc)
@@ -1,32 +1,54 @@
 import logging
+import time
 import traceback
 import uuid
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.test import Client, TestCase
-from django.utils.timezone import now
-from rest_framework import response, viewsets
+from django.test import Client, TestCase, override_settings
+from rest_framework import exceptions, response, viewsets
 from rest_framework.authentication import BaseAuthentication
 
-from api.methods import clean_sensitive_data, get_token_key, get_user_by_token
-from api.models import TokenKey
-from core.exceptions import (
-    APIAccessDenied,
-    APIConflict,
-    APIException,
-    APIForbidden,
-    APINotFound,
+from api.methods import (
+    clean_sensitive_data,
+    get_requested_fields,
+    get_token_key,
+    get_user_by_token,
+    sample_api_error,
+    sample_api_request,
 )
+from api.models import TokenKey
+from api.token_activity import token_activity
+from core.exceptions import APIAccessDenied, APINotFound, get_exception_status
+from core.metrics import add_phase, current, timed
 
 log = logging.getLogger(__name__)
+request_log = logging.getLogger("api.requests")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(queries: int):
+    """
+    Declares how many queries a handler may run, checked for every request in
+    BaseAPI.finalize_response. Auth and token activity aren't included.
+    """
+
+    def decorator(func):
+        func.query_budget = queries
+        return func
+
+    return decorator
 
 
 class TokenKeyAuthentication(BaseAuthentication):
     def authenticate(self, request):
         token_key = request.META.get("HTTP_AUTHORIZATION")
         if token_key:
-            return get_user_by_token(token_key=token_key)
+            with timed("auth"):
+                return get_user_by_token(token_key=token_key)
         return None
 
 
@@ -36,12 +58,16 @@ class BaseAPI(viewsets.GenericViewSet):
 
     authentication_classes = [TokenKeyAuthentication]
 
+    _view_started = None
+    _view_queries = None
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
     def _check_auth(self, request):
         if request.user.is_authenticated:
-            TokenKey.objects.filter(key=request.auth.key).update(last_used=now())
+            with timed("activity"):
+                token_activity.record(request.auth)
 
     def initial(self, request, *args, **kwargs):
         super().initial(request, *args, **kwargs)
@@ -51,6 +77,11 @@ class BaseAPI(viewsets.GenericViewSet):
         if self.REQUIRES_AUTH:
             self.auth_required(request=request)
 
+        self._view_started = time.perf_counter()
+        timings = current()
+        if timings is not None:
+            self._view_queries = timings.queries
+
     def admin_only(self, request):
         if (
             not request.user
@@ -63,39 +94,96 @@ class BaseAPI(viewsets.GenericViewSet):
         if not self.request.user or not self.request.user.is_authenticated:
             raise APIAccessDenied()
 
-    def _get_clean_data(self):
-        get_data = dict(self.request.GET)
-        data = self.request.data
-        post_data = None
+    def get_requested_fields(self, allowed):
+        return get_requested_fields(self.request.query_params, allowed)
 
+    def _get_clean_data(self):
         # Don't log sensitive data
-        # Checking whether it's bulk insert or not
-        if isinstance(data, list):
-            post_data = []
-            for d in data:
-                raw_post_data = dict(d)
-                post_data.append(clean_sensitive_data(raw_post_data))
-        if self.request.data:
-            raw_post_data = dict(self.request.data)
-            post_data = clean_sensitive_data(raw_post_data)
-
-        get_data = clean_sensitive_data(get_data)
+        get_data = clean_sensitive_data(dict(self.request.GET))
+        try:
+            post_data = clean_sensitive_data(self.request.data) or None
+        except exceptions.ParseError:
+            # Views that never read the body don't fail on a malformed one,
+            # logging it shouldn't either
+            post_data = None
         return get_data, post_data
 
+    def _check_query_budget(self, request):
+        handler = getattr(self, request.method.lower(), None)
+        budget = getattr(handler, "query_budget", None)
+        timings = current()
+        if budget is None or timings is None or self._view_queries is None:
+            return
+
+        queries = timings.queries - self._view_queries
+        if queries <= budget:
+            return
+
+        message = (
+            f"{type(self).__name__}.{handler.__name__} ran {queries} queries, "
+            f"its budget is {budget}"
+        )
+        if settings.API_QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        log.warning(message)
+
     def finalize_response(self, request, response, *args, **kwargs):
-        if settings.DEBUG:
+        if self._view_started is not None:
+            add_phase("view", time.perf_counter() - self._view_started)
+            if not getattr(response, "exception", False):
+                self._check_query_budget(request)
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        # DRF responses are rendered by the handler once this returns
+        if not getattr(response, "is_rendered", True):
+            render_started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda _: add_phase("render", time.perf_counter() - render_started)
+            )
+
+        endpoint = f"{type(self).__name__}.{self.action}"
+        if sample_api_request(endpoint):
             get_data, post_data = self._get_clean_data()
-            logging.info(
-                "DEBUG API call api=%s method=%s path=%s query=%s post_data=%s",
+            request_log.info(
+                "API call",
+                extra={
+                    "endpoint": endpoint,
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "user": request.user.pk,
+                    "query": get_data,
+                    "data": post_data,
+                },
+            )
+        return response
+
+    def handle_exception(self, exc):
+        # Expected errors are routine (bots, stale clients), answer them
+        # without formatting tracebacks or copying the request
+        status = get_exception_status(exc)
+        if status is not None:
+            resp = response.Response(
+                {"error": exc.message, "code": exc.code}, status=status
+            )
+            resp.exception = True
+        elif isinstance(exc, exceptions.APIException):
+            resp = super().handle_exception(exc)
+        else:
+            return self._handle_unexpected_exception(exc)
+
+        if sample_api_error():
+            log.info(
+                "API error status=%s exception=%s api=%s method=%s path=%s",
+                resp.status_code,
+                type(exc).__name__,
                 self.get_view_name(),
                 self.request.method,
                 self.request.path,
-                get_data,
-                post_data,
             )
-        return super().finalize_response(request, response, *args, **kwargs)
+        return resp
 
-    def handle_exception(self, exc):
+    def _handle_unexpected_exception(self, exc):
         tb = traceback.TracebackException.from_exception(exc)
         get_data, post_data = self._get_clean_data()
 
@@ -114,35 +202,37 @@ class BaseAPI(viewsets.GenericViewSet):
 
         try:
             return super().handle_exception(exc)
-        except APINotFound as e:
-            return response.Response({"error": e.message, "code": e.code}, status=404)
-        except APIForbidden as e:
-            return response.Response({"error": e.message, "code": e.code}, status=403)
-        except APIConflict as e:
-            return response.Response({"error": e.message, "code": e.code}, status=409)
-        except (APIException, APIAccessDenied) as e:
-            return response.Response({"error": e.message, "code": e.code}, status=400)
         except Exception:
             # Put sentry capture exception here
-            return response.Response(
+            resp = response.Response(
                 {"error": "Something went wrong.", "code": "unknown"}, status=500
             )
+            resp.exception = True
+            return resp
+
+    def get_instance(self, model, pk, filter=None, for_update=False, **query):
+        queryset = model.objects.all()
+        if for_update:
+            queryset = queryset.select_for_update()
 
-    def get_instance(self, model, pk, filter=None, **query):
         try:
             if filter:
-                return model.objects.filter(filter).get(uid=pk, **query)
-            return model.objects.get(uid=pk, **query)
+                return queryset.filter(filter).get(uid=pk, **query)
+            return queryset.get(uid=pk, **query)
         except model.DoesNotExist:
             raise APINotFound()
 
 
+# Token activity is flushed explicitly, a flusher thread would race the
+# test transaction
+@override_settings(API_QUERY_BUDGET_STRICT=True, TOKEN_ACTIVITY_BACKGROUND_FLUSH=False)
 class BaseTest(TestCase):
     DEFAULT_USERNAME = "foo@bar.com"
     DEFAULT_PASSWORD = "password"
 
     @classmethod
     def tearDownClass(cls):
+        token_activity.flush()
         super(BaseTest, cls).tearDownClass()
 
     def setUp(self):
@@ -0,0 +1,39 @@
+import hashlib
+
+from django.utils.http import parse_etags, quote_etag
+
+from todos.generations import get_generation
+
+
+def _etag(*parts) -> str:
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode())
+    return quote_etag(digest.hexdigest())
+
+
+def list_etag(user_id, query_params) -> str:
+    # The query string changes the body (fields, pages), so it's part of the tag
+    query = sorted((key, query_params.getlist(key)) for key in query_params)
+    return _etag("list", user_id, get_generation(user_id), query)
+
+
+def instance_etag(instance) -> str:
+    return _etag(instance.uid, instance.updated_on.isoformat())
+
+
+def if_none_match(request, etag: str) -> bool:
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+
+    # Weak comparison, see RFC 9110 13.1.2
+    etags = [tag.removeprefix("W/") for tag in parse_etags(header)]
+    return "*" in etags or etag in etags
+
+
+def if_match(request, etag: str) -> bool:
+    header = request.META.get("HTTP_IF_MATCH")
+    if not header:
+        return True
+
+    etags = parse_etags(header)
+    return "*" in etags or etag in etags
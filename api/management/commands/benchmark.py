@@ -0,0 +1,106 @@
+import json
+import platform
+import subprocess
+from importlib import import_module
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils.timezone import now
+
+from benchmarks.base import compare
+
+BENCHMARKS = {
+    "api": "benchmarks.api",
+    "websocket": "benchmarks.websocket",
+    "serializers": "benchmarks.serializers",
+    "async_views": "benchmarks.async_views",
+    "errors": "benchmarks.errors",
+    "login_storm": "benchmarks.login_storm",
+    "database": "benchmarks.database",
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = "Run the benchmarks against a throwaway test database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "names",
+            nargs="*",
+            help=f"Benchmarks to run, any of {', '.join(BENCHMARKS)}. Default: all.",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--sizes",
+            type=lambda value: [int(size) for size in value.split(",")],
+            help="Comma separated sizes for benchmarks that scale, e.g. todos "
+            "per user or sockets per user.",
+        )
+        parser.add_argument(
+            "--users", type=int, help="Seeded users for the api benchmark."
+        )
+        parser.add_argument("--output", help="Write the JSON results to this file.")
+        parser.add_argument(
+            "--compare",
+            help="Results file of an earlier run to print median changes against.",
+        )
+
+    def handle(self, *args, **options):
+        names = options["names"] or list(BENCHMARKS)
+        unknown = set(names) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+        results = {
+            "meta": {
+                "commit": _git_commit(),
+                "date": now().isoformat(),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "repeat": options["repeat"],
+            }
+        }
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            for name in names:
+                self.stderr.write(f"Running {name}...")
+                module = import_module(BENCHMARKS[name])
+                results[name] = module.run(
+                    repeat=options["repeat"],
+                    sizes=options["sizes"],
+                    users=options["users"],
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+        self.stdout.write(output)
+
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                baseline = json.load(f)
+            self.stderr.write(
+                f"Median vs {baseline.get('meta', {}).get('commit') or 'baseline'}:"
+            )
+            for path, old, new, ratio in compare(baseline, results):
+                self.stderr.write(
+                    f"  {path}: {old:.3f}ms -> {new:.3f}ms ({ratio:.2f}x)"
+                )
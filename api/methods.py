@@ -1,9 +1,14 @@
+import random
+import re
 import uuid
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from rest_framework.exceptions import AuthenticationFailed
 
 from api.models import TokenKey
+from api.token_cache import token_cache
+from core.exceptions import APIException
 
 SENSITIVE_ATTRIBUTES = [
     "key",
@@ -13,14 +18,57 @@ SENSITIVE_ATTRIBUTES = [
 ]
 
 
-def clean_sensitive_data(data):
-    for key, value in data.items():
-        if key in SENSITIVE_ATTRIBUTES:
-            data[key] = "****"
+# Also catches prefixed variants like new_password or id_token
+SENSITIVE_KEY = re.compile(
+    rf"(?:^|_)(?:{'|'.join(map(re.escape, SENSITIVE_ATTRIBUTES))})$", re.IGNORECASE
+)
+
 
+def clean_sensitive_data(data):
+    if isinstance(data, dict):
+        return {
+            key: (
+                "****"
+                if isinstance(key, str) and SENSITIVE_KEY.search(key)
+                else clean_sensitive_data(value)
+            )
+            for key, value in data.items()
+        }
+    if isinstance(data, (list, tuple)):
+        return [clean_sensitive_data(value) for value in data]
     return data
 
 
+def sample_api_error() -> bool:
+    return random.random() < settings.API_ERROR_LOG_SAMPLE_RATE
+
+
+def sample_api_request(endpoint: str) -> bool:
+    rates = settings.API_REQUEST_LOG_SAMPLE_RATES
+    rate = rates.get(endpoint)
+    if rate is None:
+        rate = rates.get(
+            endpoint.split(".")[0] + ".*", settings.API_REQUEST_LOG_SAMPLE_RATE
+        )
+    return random.random() < rate
+
+
+def get_requested_fields(query_params, allowed):
+    fields = query_params.get("fields")
+    if not fields:
+        return None
+
+    fields = [field.strip() for field in fields.split(",") if field.strip()]
+    invalid = set(fields) - set(allowed)
+    if invalid:
+        raise APIException(
+            code="invalid_fields",
+            message=f"Unknown fields: {', '.join(sorted(invalid))}.",
+        )
+
+    return fields
+
+
 def generate_token_key(rounds=2) -> str:
     return "".join(str(uuid.uuid4()).replace("-", "") for _ in range(rounds))
 
@@ -32,6 +80,13 @@ def get_token_key(user: User) -> TokenKey:
     return key
 
 
+async def aget_token_key(user: User) -> TokenKey:
+    key, _ = await TokenKey.objects.aget_or_create(
+        user=user, defaults={"key": generate_token_key()}
+    )
+    return key
+
+
 def get_user_by_token(token_key: str = None):
     if not token_key:
         return None
@@ -40,16 +95,53 @@ def get_user_by_token(token_key: str = None):
     if len(token_key) != 2:
         return None
 
+    return get_user_by_token_key(key=token_key[1])
+
+
+def get_user_by_token_key(key: str):
+    cached = token_cache.get(key)
+    if cached is not None:
+        return cached
+
     try:
-        token_key = TokenKey.objects.prefetch_related("user").get(
-            key=token_key[1], is_active=True
+        token_key = TokenKey.objects.select_related("user").get(
+            key=key, is_active=True, user__is_active=True
         )
         user = token_key.user
     except TokenKey.DoesNotExist:
         raise AuthenticationFailed(code="invalid_token_key", detail="Invalid Token Key")
 
+    token_cache.set(key, (user, token_key))
+    return user, token_key
+
+
+async def aget_user_by_token_key(key: str):
+    cached = await token_cache.aget(key)
+    if cached is not None:
+        return cached
+
+    try:
+        token_key = await TokenKey.objects.select_related("user").aget(
+            key=key, is_active=True, user__is_active=True
+        )
+        user = token_key.user
+    except TokenKey.DoesNotExist:
+        raise AuthenticationFailed(code="invalid_token_key", detail="Invalid Token Key")
+
+    await token_cache.aset(key, (user, token_key))
     return user, token_key
 
 
 def delete_user_token_key(user: User, token_key: str) -> tuple[int, dict]:
     return TokenKey.objects.get(user=user, key=token_key).delete()
+
+
+def deactivate_users(users) -> int:
+    """
+    Deactivates a User queryset and revokes its cached tokens, which
+    User.objects.update() alone would leave valid for the cache TTL.
+    """
+    keys = list(TokenKey.objects.filter(user__in=users).values_list("key", flat=True))
+    updated = users.update(is_active=False)
+    token_cache.invalidate(*keys)
+    return updated
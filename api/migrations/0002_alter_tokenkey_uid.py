@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+import core.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # uid is unique, which already indexes it, so dropping db_index
+        # changes no schema and doesn't need SQLite's table rebuild
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name="tokenkey",
+                    name="uid",
+                    field=models.CharField(
+                        default=core.models.set_objectid, max_length=32, unique=True
+                    ),
+                ),
+            ],
+        ),
+    ]
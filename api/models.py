@@ -1,9 +1,56 @@
+from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 
+from api.token_cache import token_cache
 from core.models import BaseModel
 
 
+class TokenKeyQuerySet(models.QuerySet):
+    """
+    Revoking tokens goes through deactivate() or delete(), which drop the
+    keys from the token cache. A plain update() of is_active doesn't.
+    """
+
+    def deactivate(self) -> int:
+        keys = list(self.values_list("key", flat=True))
+        updated = self.filter(key__in=keys).update(is_active=False)
+        token_cache.invalidate(*keys)
+        return updated
+
+    def delete(self):
+        keys = list(self.values_list("key", flat=True))
+        deleted = super().delete()
+        token_cache.invalidate(*keys)
+        return deleted
+
+
 class TokenKey(BaseModel):
     key = models.CharField(max_length=128, unique=True)
     is_active = models.BooleanField(default=True)
     last_used = models.DateTimeField(null=True, blank=True)
+
+    objects = TokenKeyQuerySet.as_manager()
+
+    def deactivate(self):
+        self.is_active = False
+        self.save(update_fields=["is_active"])
+        token_cache.invalidate(self.key)
+
+    def delete(self, *args, **kwargs):
+        deleted = super().delete(*args, **kwargs)
+        token_cache.invalidate(self.key)
+        return deleted
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_token_cache(sender, instance, created, update_fields, **kwargs):
+    # Profile edits (admin, allauth) refresh the cached user, deactivation
+    # that skips save() goes through deactivate_users()
+    if created or (update_fields and set(update_fields) == {"last_login"}):
+        return
+
+    token_cache.invalidate(
+        *TokenKey.objects.filter(user=instance).values_list("key", flat=True)
+    )
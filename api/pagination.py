@@ -0,0 +1,95 @@
+import base64
+import binascii
+from datetime import datetime, timedelta, timezone
+from operator import attrgetter
+
+from django.conf import settings
+
+from core.exceptions import APIException
+
+CURSOR_PARAMS = ("cursor", "page_size")
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_cursor(value: str) -> str:
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        value = base64.b64decode(cursor + padding, altchars=b"-_", validate=True)
+        value = value.decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        value = None
+
+    if not value:
+        raise APIException(code="invalid_cursor", message="Invalid cursor.")
+
+    return value
+
+
+def encode_timestamp_cursor(timestamp: datetime) -> str:
+    micros = (timestamp - EPOCH) // timedelta(microseconds=1)
+    return encode_cursor(str(micros))
+
+
+def decode_timestamp_cursor(cursor: str) -> datetime:
+    try:
+        return EPOCH + timedelta(microseconds=int(decode_cursor(cursor)))
+    except (ValueError, OverflowError):
+        raise APIException(code="invalid_cursor", message="Invalid cursor.")
+
+
+def is_paginated(query_params) -> bool:
+    return any(param in query_params for param in CURSOR_PARAMS)
+
+
+def get_page_size(query_params) -> int:
+    page_size = query_params.get("page_size")
+    if not page_size:
+        return settings.TODO_PAGE_SIZE
+
+    try:
+        page_size = int(page_size)
+    except ValueError:
+        raise APIException(code="invalid_page_size", message="Invalid page size.")
+
+    if page_size < 1:
+        raise APIException(code="invalid_page_size", message="Invalid page size.")
+
+    return min(page_size, settings.TODO_MAX_PAGE_SIZE)
+
+
+def _page_queryset(queryset, query_params):
+    cursor = query_params.get("cursor")
+    page_size = get_page_size(query_params)
+
+    queryset = queryset.order_by("-uid")
+    if cursor:
+        queryset = queryset.filter(uid__lt=decode_cursor(cursor))
+
+    # One extra row tells whether there is a next page
+    return queryset[: page_size + 1], page_size
+
+
+def _page(rows, page_size, get_uid):
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    return rows, encode_cursor(get_uid(rows[-1]))
+
+
+def paginate_by_uid(queryset, query_params, get_uid=attrgetter("uid")):
+    """
+    Keyset pagination over the time ordered ``uid``, newest first. Returns the
+    page rows and the cursor of the next page, if any.
+    """
+    queryset, page_size = _page_queryset(queryset, query_params)
+    return _page(list(queryset), page_size, get_uid)
+
+
+async def apaginate_by_uid(queryset, query_params, get_uid=attrgetter("uid")):
+    queryset, page_size = _page_queryset(queryset, query_params)
+    return _page([row async for row in queryset], page_size, get_uid)
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import (
+    UNUSABLE_PASSWORD_PREFIX,
+    make_password,
+    verify_password,
+)
+from django.contrib.auth.models import User
+from django.core.exceptions import PermissionDenied
+
+from core.exceptions import APITooManyRequests
+
+
+class PasswordHasherPool:
+    """
+    Runs password hashing and verification for the async views on a bounded
+    thread pool, the PBKDF2 rounds release the GIL so they no longer stall
+    the event loop. Jobs beyond PASSWORD_HASH_MAX_PENDING (queued and
+    running) are rejected with APITooManyRequests instead of queueing.
+
+    The sync views still hash on the request thread, but take a slot() from
+    the same pending count so they are shed alike.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = 0
+        self._stats = {"completed": 0, "rejected": 0}
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    thread_name_prefix="password-hash",
+                )
+            return self._executor
+
+    def _acquire(self):
+        with self._lock:
+            if self._pending >= settings.PASSWORD_HASH_MAX_PENDING:
+                self._stats["rejected"] += 1
+                raise APITooManyRequests()
+            self._pending += 1
+
+    def _release(self, *args):
+        with self._lock:
+            self._pending -= 1
+            self._stats["completed"] += 1
+
+    def submit(self, func, *args):
+        self._acquire()
+        try:
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    @contextmanager
+    def slot(self):
+        self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def amake(self, password: str) -> str:
+        return await asyncio.wrap_future(self.submit(make_password, password))
+
+    async def averify(self, password: str, encoded: str) -> tuple[bool, bool]:
+        # (is_correct, must_update), an unusable hash still runs the hasher
+        return await asyncio.wrap_future(
+            self.submit(verify_password, password, encoded)
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = self._pending
+        stats["workers"] = settings.PASSWORD_HASH_WORKERS
+        return stats
+
+
+passwords = PasswordHasherPool()
+
+
+def new_user(email: str, encoded: str) -> User:
+    # Same normalization as create_user, with the password hashed beforehand
+    return User(
+        username=User.normalize_username(email),
+        email=User.objects.normalize_email(email),
+        password=encoded,
+    )
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend whose async path checks passwords on the hashing pool
+    instead of the single thread sync_to_async would run it on. The sync
+    path is ModelBackend's, hashing on the request thread.
+
+    The async path also looks users up by email, like allauth's backend, and
+    ends the backend chain on a failed check: the backends after it would
+    hash the password again, inline on the event loop.
+    """
+
+    async def _aget_user(self, username: str) -> User | None:
+        try:
+            return await User._default_manager.aget_by_natural_key(username)
+        except User.DoesNotExist:
+            return await User._default_manager.filter(email__iexact=username).afirst()
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        user = await self._aget_user(username)
+        # Unknown users pay for one hash, like wrong passwords do
+        is_correct, must_update = await passwords.averify(
+            password, user.password if user else UNUSABLE_PASSWORD_PREFIX
+        )
+        if not is_correct or not self.user_can_authenticate(user):
+            raise PermissionDenied()
+
+        if must_update:
+            user.password = await passwords.amake(password)
+            await user.asave(update_fields=["password"])
+        return user
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class ResponseCache:
+    """
+    Caches response data in Django's cache framework. A miss recomputes under
+    a cache lock, so concurrent misses for the same key wait for a single
+    recompute instead of all hitting the database.
+
+    Entries are never invalidated, keys must carry a version read from the
+    database (see todos.generations) so a write on any worker retires them.
+    On a process local backend each worker then keeps its own copy.
+    """
+
+    POLL_INTERVAL = 0.01
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "waits": 0, "fallbacks": 0}
+
+    @property
+    def cache(self):
+        return caches[settings.TODO_CACHE_ALIAS]
+
+    def _incr(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _compute(self, key: str, compute):
+        data = compute()
+        self.cache.set(key, data, settings.TODO_LIST_CACHE_TTL)
+        return data
+
+    def get_or_set(self, key: str, compute):
+        if not settings.TODO_LIST_CACHE_ENABLED:
+            return compute()
+
+        key = f"{self.prefix}:{key}"
+        data = self.cache.get(key)
+        if data is not None:
+            self._incr("hits")
+            return data
+
+        self._incr("misses")
+        lock_key = f"{key}:lock"
+        if self.cache.add(lock_key, 1, settings.TODO_LIST_CACHE_LOCK_TIMEOUT):
+            try:
+                return self._compute(key, compute)
+            finally:
+                self.cache.delete(lock_key)
+
+        self._incr("waits")
+        deadline = time.monotonic() + settings.TODO_LIST_CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(self.POLL_INTERVAL)
+            data = self.cache.get(key)
+            if data is not None:
+                return data
+
+        # The lock holder is too slow or gone, don't keep the client waiting
+        self._incr("fallbacks")
+        return self._compute(key, compute)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+todo_list_cache = ResponseCache(prefix="todos:list")
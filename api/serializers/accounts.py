@@ -8,7 +8,15 @@ class LoginSerializer(serializers.Serializer):
 
 
 class GoogleAuthSerializer(serializers.Serializer):
-    access_token = serializers.CharField(required=True)
+    access_token = serializers.CharField(required=False)
+    id_token = serializers.CharField(required=False)
+
+    def validate(self, attrs):
+        if bool(attrs.get("access_token")) == bool(attrs.get("id_token")):
+            raise serializers.ValidationError(
+                "Expected either an access_token or an id_token."
+            )
+        return attrs
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -1,3 +1,4 @@
+from bson import objectid
 from rest_framework import serializers
 
 from todos.models import Todo
@@ -9,3 +10,60 @@ class TodoSerializer(serializers.ModelSerializer):
     class Meta:
         model = Todo
         fields = ["id", "name", "description", "done"]
+
+    _sources = None
+
+    def validate_id(self, value):
+        # Client generated ids must sort like server ones for the uid cursors
+        if not objectid.ObjectId.is_valid(value):
+            raise serializers.ValidationError("Expected an ObjectId.")
+        return value
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # Narrow the output to the requested fields
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def get_sources(cls, fields) -> list[str]:
+        if cls._sources is None:
+            cls._sources = {name: field.source for name, field in cls().fields.items()}
+        return [cls._sources[name] for name in fields]
+
+    @classmethod
+    def values_queryset(cls, queryset, fields=None):
+        """
+        Rows for ``serialize_values``: the uid first, then one column per
+        field. Used by the fast path of hot list endpoints.
+        """
+        fields = cls.ordered_fields(fields)
+        return queryset.values_list("uid", *cls.get_sources(fields))
+
+    @classmethod
+    def serialize_values(cls, rows, fields=None) -> list[dict]:
+        # Same output as TodoSerializer(many=True).data without the per-field
+        # to_representation calls; all the columns are already JSON types
+        fields = cls.ordered_fields(fields)
+        return [dict(zip(fields, row[1:])) for row in rows]
+
+    @classmethod
+    def ordered_fields(cls, fields=None) -> list[str]:
+        if fields is None:
+            return cls.Meta.fields
+        return [name for name in cls.Meta.fields if name in fields]
+
+
+class BulkOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=["create", "update", "delete"])
+    id = serializers.CharField(required=False, max_length=32)
+
+    def validate(self, attrs):
+        if attrs["op"] != "create" and not attrs.get("id"):
+            raise serializers.ValidationError("Expected an id to update or delete.")
+        if attrs["op"] == "create" and "id" in attrs:
+            if not objectid.ObjectId.is_valid(attrs["id"]):
+                raise serializers.ValidationError({"id": "Expected an ObjectId."})
+        return attrs
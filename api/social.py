@@ -0,0 +1,312 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+
+import jwt
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.exceptions import APIServiceUnavailable
+
+log = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failures`` consecutive failed calls and rejects calls for
+    ``reset_timeout`` seconds, then lets a single trial call through.
+    """
+
+    def __init__(self, failures: int, reset_timeout: float):
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failed = 0
+        self._opened_at = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failed = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failed += 1
+            self._trial = False
+            if self._opened_at is not None or self._failed >= self.failures:
+                self._opened_at = time.monotonic()
+
+
+class OutboundClient:
+    """
+    Keep-alive session per provider with connect/read timeouts, retries of
+    idempotent requests and a circuit breaker. Connection errors, timeouts
+    and 5xx responses count as failures, other responses are returned.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(
+            failures=settings.SOCIAL_HTTP_CIRCUIT_FAILURES,
+            reset_timeout=settings.SOCIAL_HTTP_CIRCUIT_RESET_TIMEOUT,
+        )
+        self._session = None
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "failures": 0, "rejected": 0}
+
+    @property
+    def session(self) -> requests.Session:
+        with self._lock:
+            if self._session is None:
+                # Read timeouts aren't retried, a slow provider would hold
+                # the worker for every attempt
+                retry = Retry(
+                    total=settings.SOCIAL_HTTP_RETRIES,
+                    read=0,
+                    backoff_factor=0.1,
+                    status_forcelist=(502, 503, 504),
+                    allowed_methods={"GET"},
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_maxsize=settings.SOCIAL_HTTP_POOL_SIZE, max_retries=retry
+                )
+                self._session = requests.Session()
+                self._session.mount("https://", adapter)
+                self._session.mount("http://", adapter)
+            return self._session
+
+    def _incr(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        if not self.breaker.allow():
+            self._incr("rejected")
+            raise APIServiceUnavailable(message=f"{self.name} is unavailable.")
+
+        self._incr("requests")
+        try:
+            response = self.session.get(
+                url,
+                timeout=(
+                    settings.SOCIAL_HTTP_CONNECT_TIMEOUT,
+                    settings.SOCIAL_HTTP_READ_TIMEOUT,
+                ),
+                **kwargs,
+            )
+        except requests.RequestException as exc:
+            self._failed(exc)
+        else:
+            if response.status_code < 500:
+                self.breaker.record_success()
+                return response
+            self._failed(f"status {response.status_code}")
+
+    def _failed(self, reason):
+        self._incr("failures")
+        self.breaker.record_failure()
+        log.warning("Outbound request to %s failed: %s", self.name, reason)
+        raise APIServiceUnavailable(message=f"{self.name} is unavailable.")
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["circuit_open"] = int(self.breaker.state == "open")
+        return stats
+
+
+_clients_lock = threading.Lock()
+clients = {}
+
+
+def get_client(provider: str) -> OutboundClient:
+    with _clients_lock:
+        if provider not in clients:
+            clients[provider] = OutboundClient(provider)
+        return clients[provider]
+
+
+def stats() -> dict:
+    with _clients_lock:
+        current = list(clients.values())
+    stats = {
+        f"{client.name}_{key}": value
+        for client in current
+        for key, value in client.stats().items()
+    }
+    stats["google_jwks_refreshes"] = google_jwks.refreshes
+    stats["google_jwks_failures"] = google_jwks.failures
+    return stats
+
+
+def get_userinfo(provider: str, access_token: str) -> dict | None:
+    """
+    The provider's userinfo for the access token, None when the provider
+    rejects it. Answers are cached briefly under a hash of the token.
+    """
+    cache = caches[settings.SOCIAL_USERINFO_CACHE_ALIAS]
+    digest = hashlib.sha256(access_token.encode()).hexdigest()
+    cache_key = f"social:userinfo:{provider}:{digest}"
+
+    userinfo = cache.get(cache_key)
+    if userinfo is not None:
+        return userinfo
+
+    response = get_client(provider).get(
+        settings.SOCIALACCOUNT_PROVIDERS[provider]["USERINFO_URL"],
+        headers={
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/json",
+        },
+    )
+    if not response.ok:
+        return None
+
+    try:
+        userinfo = response.json()
+    except ValueError:
+        return None
+
+    cache.set(cache_key, userinfo, settings.SOCIAL_USERINFO_CACHE_TTL)
+    return userinfo
+
+
+class JWKSCache:
+    """
+    A provider's signing keys, fetched from its JWKS URL and kept for the
+    Cache-Control max-age, SOCIAL_JWKS_TTL without one. Expired keys and
+    unknown key ids trigger a refresh, at most one attempt at a time and one
+    per SOCIAL_JWKS_MIN_REFRESH_INTERVAL, failed ones included. A failed
+    refresh keeps serving the keys already held.
+    """
+
+    MAX_AGE = re.compile(r"max-age=(\d+)")
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._keys = {}
+        self._expires = 0.0
+        self._attempted = None
+        self.refreshes = 0
+        self.failures = 0
+
+    def _fetch(self) -> tuple[dict, float]:
+        url = settings.SOCIALACCOUNT_PROVIDERS[self.provider]["JWKS_URL"]
+        response = get_client(self.provider).get(url)
+        if not response.ok:
+            raise APIServiceUnavailable(message=f"{self.provider} is unavailable.")
+
+        max_age = self.MAX_AGE.search(response.headers.get("Cache-Control", ""))
+        return response.json(), (
+            int(max_age.group(1)) if max_age else settings.SOCIAL_JWKS_TTL
+        )
+
+    def _lookup(self, key_id: str) -> tuple[jwt.PyJWK | None, bool]:
+        now = time.monotonic()
+        with self._lock:
+            key = self._keys.get(key_id)
+            wanted = key is None or now >= self._expires
+            allowed = (
+                self._attempted is None
+                or now - self._attempted >= settings.SOCIAL_JWKS_MIN_REFRESH_INTERVAL
+            )
+            return key, wanted and allowed
+
+    def _refresh(self):
+        with self._lock:
+            self._attempted = time.monotonic()
+
+        try:
+            data, ttl = self._fetch()
+            keys = {key.key_id: key for key in jwt.PyJWKSet.from_dict(data).keys}
+        except (APIServiceUnavailable, ValueError, jwt.PyJWTError):
+            with self._lock:
+                self.failures += 1
+                has_keys = bool(self._keys)
+            if not has_keys:
+                raise
+            log.warning(
+                "Refreshing %s keys failed, keeping the old ones", self.provider
+            )
+            return
+
+        with self._lock:
+            self._keys = keys
+            self._expires = time.monotonic() + ttl
+            self.refreshes += 1
+
+    def get_key(self, key_id: str) -> jwt.PyJWK | None:
+        key, refresh = self._lookup(key_id)
+        if not refresh:
+            return key
+
+        with self._refresh_lock:
+            # Checked again, the previous holder may have just refreshed
+            key, refresh = self._lookup(key_id)
+            if refresh:
+                self._refresh()
+                key, _ = self._lookup(key_id)
+        return key
+
+
+google_jwks = JWKSCache("google")
+
+
+def verify_google_id_token(id_token: str) -> dict | None:
+    """
+    The claims of a Google ID token whose signature, audience, issuer and
+    expiry check out locally, None otherwise.
+    """
+    provider = settings.SOCIALACCOUNT_PROVIDERS["google"]
+    audiences = [app["client_id"] for app in provider["APPS"] if app["client_id"]]
+    audiences += provider["ID_TOKEN_AUDIENCES"]
+
+    try:
+        header = jwt.get_unverified_header(id_token)
+        key = google_jwks.get_key(header.get("kid"))
+        if key is None or not audiences:
+            return None
+
+        return jwt.decode(
+            id_token,
+            key,
+            algorithms=["RS256"],
+            audience=audiences,
+            issuer=provider["ISSUERS"],
+            leeway=settings.SOCIAL_JWT_LEEWAY,
+            options={"require": ["exp", "iat", "iss", "aud", "sub"]},
+        )
+    except jwt.PyJWTError:
+        return None
@@ -1,4 +1,10 @@
+import threading
 from http import HTTPStatus
+from unittest import mock
+
+from channels.db import database_sync_to_async
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.test import override_settings
 
 from api.base import BaseTest
 
@@ -35,3 +41,92 @@ class TestAccount(BaseTest):
     def test_no_token(self):
         res = self._get("/api/accounts/")
         self.assertEqual(res.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_invalid_credential(self):
+        for email in ["foo@buzz.com", "unknown@buzz.com"]:
+            res = self._post(
+                "/api/accounts/login/",
+                data={"email": email, "password": "wrong"},
+            )
+            self.assertEqual(res.status_code, HTTPStatus.BAD_REQUEST)
+            self.assertEqual(res.data["code"], "invalid_credential")
+
+    def test_login_upgrades_password_hash(self):
+        self.user.password = make_password("All-f0r-1", hasher="pbkdf2_sha1")
+        self.user.save()
+
+        res = self._post(
+            "/api/accounts/login/",
+            data={"email": "foo@buzz.com", "password": "All-f0r-1"},
+        )
+        self.assertEqual(res.status_code, HTTPStatus.OK)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+
+    @override_settings(PASSWORD_HASH_MAX_PENDING=0)
+    async def test_password_hashing_sheds_load(self):
+        data = {"email": "foo@buzz.com", "password": "All-f0r-1"}
+        res = await self.async_client.post(
+            "/api/async/accounts/login/", data, content_type="application/json"
+        )
+        self.assertEqual(res.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(res.json()["code"], "too_many_requests")
+
+        # The sync views hash on the request thread, under the same limit
+        for path in ["/api/accounts/login/", "/api/accounts/register/"]:
+            res = await self.async_client.post(
+                path, data, content_type="application/json"
+            )
+            self.assertEqual(res.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+
+    async def test_async_register_login(self):
+        email = self._create_fake_email()
+        data = {"email": email, "password": "All-f0r-1"}
+
+        res = await self.async_client.post(
+            "/api/async/accounts/register/", data, content_type="application/json"
+        )
+        self.assertEqual(res.status_code, HTTPStatus.OK)
+        token = res.json()["token"]
+
+        res = await self.async_client.post(
+            "/api/async/accounts/login/", data, content_type="application/json"
+        )
+        self.assertEqual(res.json(), {"token": token})
+
+        with self.settings(PASSWORD_HASH_MAX_PENDING=0):
+            res = await self.async_client.post(
+                "/api/async/accounts/login/", data, content_type="application/json"
+            )
+        self.assertEqual(res.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+
+        res = await self.async_client.post(
+            "/api/async/accounts/register/", data, content_type="application/json"
+        )
+        self.assertEqual(res.json()["code"], "user_exist")
+
+    async def test_async_failed_login_hashes_on_pool(self):
+        await database_sync_to_async(self._set_password)("All-f0r-1")
+        threads = []
+        encode = PBKDF2PasswordHasher.encode
+
+        def record(hasher, *args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return encode(hasher, *args, **kwargs)
+
+        with mock.patch.object(PBKDF2PasswordHasher, "encode", record):
+            for email in ["foo@buzz.com", "unknown@buzz.com"]:
+                res = await self.async_client.post(
+                    "/api/async/accounts/login/",
+                    {"email": email, "password": "wrong"},
+                    content_type="application/json",
+                )
+                self.assertEqual(res.json()["code"], "invalid_credential")
+
+        # One hash per attempt, none on the event loop
+        self.assertEqual(len(threads), 2)
+        self.assertTrue(all(name.startswith("password-hash") for name in threads))
+
+    def _set_password(self, password):
+        self.user.set_password(password)
+        self.user.save()
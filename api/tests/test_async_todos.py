@@ -0,0 +1,108 @@
+from http import HTTPStatus
+from unittest import mock
+
+from channels.db import database_sync_to_async
+from django.db.models import QuerySet
+
+from api.base import BaseTest
+from todos.models import Todo
+
+
+class TestAsyncTodo(BaseTest):
+    def setUp(self):
+        self.user = self._create_account(
+            username="foo@buzz.com",
+        )
+        self.token = self._get_api_token(user=self.user)
+        self.headers = {"Authorization": f"bearer {self.token}"}
+
+    async def test_todo(self):
+        client = self.async_client
+
+        response = await client.post(
+            "/api/async/todos/",
+            {"name": "#1 todo"},
+            content_type="application/json",
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        todo = response.json()
+        self.assertEqual(todo["name"], "#1 todo")
+
+        response = await client.get("/api/async/todos/", headers=self.headers)
+        self.assertEqual(response.json(), [todo])
+
+        path = f"/api/async/todos/{todo['id']}/"
+        response = await client.get(path, headers=self.headers)
+        self.assertEqual(response.json(), todo)
+
+        response = await client.put(
+            path,
+            {"done": True},
+            content_type="application/json",
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.json()["done"])
+
+        response = await client.delete(path, headers=self.headers)
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        self.assertFalse(await Todo.objects.filter(uid=todo["id"]).aexists())
+
+    async def test_same_output_as_sync(self):
+        await database_sync_to_async(Todo.objects.create)(
+            user=self.user, name="#1 todo"
+        )
+
+        for query in ["", "?fields=id,done", "?page_size=1"]:
+            sync = await self.async_client.get(
+                f"/api/todos/{query}", headers=self.headers
+            )
+            response = await self.async_client.get(
+                f"/api/async/todos/{query}", headers=self.headers
+            )
+            self.assertEqual(response.content, sync.content)
+
+    async def test_auth(self):
+        response = await self.async_client.get("/api/async/todos/")
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+        response = await self.async_client.get(
+            "/api/async/todos/", headers={"Authorization": "bearer invalid"}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    async def test_not_found(self):
+        response = await self.async_client.get(
+            "/api/async/todos/missing/", headers=self.headers
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertEqual(response.json()["code"], "not_found")
+
+    async def test_if_match(self):
+        todo = await database_sync_to_async(Todo.objects.create)(
+            user=self.user, name="#1 todo"
+        )
+        path = f"/api/async/todos/{todo.uid}/"
+        etag = (await self.async_client.get(path, headers=self.headers))["ETag"]
+
+        with mock.patch(
+            "django.db.models.QuerySet.select_for_update",
+            autospec=True,
+            side_effect=QuerySet.select_for_update,
+        ) as select_for_update:
+            response = await self.async_client.put(
+                path,
+                {"done": True},
+                content_type="application/json",
+                headers={**self.headers, "If-Match": etag},
+            )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        # The check and the write share one transaction on the locked row
+        select_for_update.assert_called_once()
+
+        # Stale tag
+        for method in [self.async_client.put, self.async_client.delete]:
+            response = await method(path, headers={**self.headers, "If-Match": etag})
+            self.assertEqual(response.status_code, HTTPStatus.PRECONDITION_FAILED)
+        self.assertTrue(await Todo.objects.filter(uid=todo.uid, done=True).aexists())
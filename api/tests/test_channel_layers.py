@@ -0,0 +1,79 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from core.channel_layers import BrokerChannelLayer, ChannelBroker
+
+
+class TestBrokerChannelLayer(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.brokers = [ChannelBroker(), ChannelBroker()]
+        hosts = [await broker.start(port=0) for broker in self.brokers]
+        # Two workers, each with its own connections to both shards
+        self.layers = [BrokerChannelLayer(hosts=hosts) for _ in range(2)]
+
+    async def asyncTearDown(self):
+        for layer in self.layers:
+            await layer.close()
+        for broker in self.brokers:
+            await broker.close()
+
+    async def _receive(self, layer, channel):
+        return await asyncio.wait_for(layer.receive(channel), timeout=1)
+
+    async def test_group_fan_out_across_workers(self):
+        groups = [f"todos.user.{index}" for index in range(10)]
+        channels = [await layer.new_channel() for layer in self.layers]
+        for group in groups:
+            for layer, channel in zip(self.layers, channels):
+                await layer.group_add(group, channel)
+
+        for group in groups:
+            await self.layers[0].group_send(group, {"type": "todo.created", "g": group})
+            for layer, channel in zip(self.layers, channels):
+                message = await self._receive(layer, channel)
+                self.assertEqual(message, {"type": "todo.created", "g": group})
+
+        # Groups are spread over both brokers
+        self.assertTrue(all(broker.groups for broker in self.brokers))
+        self.assertEqual(
+            sum(len(broker.groups) for broker in self.brokers), len(groups)
+        )
+
+    async def test_send_and_discard(self):
+        first, second = self.layers
+        channel = await second.new_channel()
+
+        await first.send(channel, {"type": "ping"})
+        self.assertEqual(await self._receive(second, channel), {"type": "ping"})
+
+        await second.group_add("todos.user.1", channel)
+        await second.group_discard("todos.user.1", channel)
+        await first.group_send("todos.user.1", {"type": "ping"})
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(second.receive(channel), timeout=0.1)
+
+    async def test_broker_forgets_closed_worker(self):
+        channel = await self.layers[1].new_channel()
+        await self.layers[1].group_add("todos.user.1", channel)
+        self.assertTrue(any(broker.groups for broker in self.brokers))
+
+        await self.layers[1].close()
+        await asyncio.sleep(0.05)
+        self.assertFalse(any(broker.groups for broker in self.brokers))
+
+    async def test_reconnect_task_is_kept(self):
+        layer = self.layers[0]
+        channel = await layer.new_channel()
+        await layer.group_add("todos.user.1", channel)
+
+        for broker in self.brokers:
+            await broker.close()
+        await asyncio.sleep(0.05)
+
+        # Held by the layer until it reconnects or is closed
+        reconnects = set(layer._state().reconnects)
+        self.assertTrue(reconnects)
+
+        await layer.close()
+        await asyncio.sleep(0)
+        self.assertTrue(all(task.cancelled() for task in reconnects))
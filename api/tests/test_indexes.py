@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.utils.timezone import now
+
+from api.base import BaseTest
+from api.models import TokenKey
+from todos.generations import generation_queryset
+from todos.models import Todo, TodoTombstone
+
+
+class TestQueryPlans(BaseTest):
+    def setUp(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Plans are checked with SQLite's EXPLAIN QUERY PLAN")
+
+        self.user = self._create_account(
+            username="foo@buzz.com",
+        )
+        self.token = self._get_api_token(user=self.user)
+        self.todos = self._create_todos(5)
+
+    def _create_todos(self, count):
+        return Todo.objects.bulk_create(
+            [Todo(user=self.user, name=f"#{i} todo") for i in range(count)]
+        )
+
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(index, plan)
+        # A SCAN reads the whole table (or index), a temp B-tree sorts rows
+        self.assertNotIn("SCAN", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_todo_list(self):
+        todos = Todo.objects.filter(user=self.user)
+        self.assertUsesIndex(todos, "todos_todo_user_uid_idx")
+
+        # Cursor pages
+        self.assertUsesIndex(
+            todos.filter(uid__lt=self.todos[2].uid)[:2], "todos_todo_user_uid_idx"
+        )
+
+    def test_todo_by_uid(self):
+        self.assertUsesIndex(
+            Todo.objects.filter(uid=self.todos[0].uid, user=self.user),
+            "sqlite_autoindex_todos_todo",
+        )
+
+    def test_changes(self):
+        since = now() - timedelta(hours=1)
+        self.assertUsesIndex(
+            Todo.objects.filter(user=self.user, updated_on__gt=since).order_by(
+                "updated_on"
+            ),
+            "todos_todo_user_updated_idx",
+        )
+        self.assertUsesIndex(
+            TodoTombstone.objects.filter(user=self.user, created_on__gt=since)
+            .order_by("created_on")
+            .values_list("todo_uid", "created_on"),
+            "todos_todot_user_id_be8540_idx",
+        )
+
+    def test_generation(self):
+        plan = generation_queryset(self.user.id).explain()
+        self.assertIn("USING INTEGER PRIMARY KEY", plan)
+        self.assertNotIn("SCAN", plan)
+
+    def test_no_redundant_user_indexes(self):
+        # The composite indexes lead with user_id, a lone one only costs writes
+        with connection.cursor() as cursor:
+            for table in ["todos_todo", "todos_todotombstone"]:
+                constraints = connection.introspection.get_constraints(cursor, table)
+                self.assertNotIn(
+                    ["user_id"],
+                    [c["columns"] for c in constraints.values() if c["index"]],
+                )
+
+    def test_active_token(self):
+        # The unique key constraint's index, get() drops the ordering
+        self.assertUsesIndex(
+            TokenKey.objects.select_related("user")
+            .filter(key=self.token, is_active=True, user__is_active=True)
+            .order_by(),
+            "sqlite_autoindex_api_tokenkey",
+        )
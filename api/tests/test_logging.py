@@ -0,0 +1,69 @@
+import json
+import logging
+from http import HTTPStatus
+
+from django.test import SimpleTestCase, override_settings
+
+from api.base import BaseTest
+from api.methods import clean_sensitive_data
+from core.structured_logging import JSONFormatter
+
+
+class TestRequestLogging(BaseTest):
+    def setUp(self):
+        self.user = self._create_account(
+            username="foo@buzz.com",
+        )
+        self.token = self._get_api_token(user=self.user)
+
+    @override_settings(
+        API_REQUEST_LOG_SAMPLE_RATE=0, API_REQUEST_LOG_SAMPLE_RATES={"AccountAPI.*": 1}
+    )
+    def test_sampling_per_endpoint(self):
+        with self.assertLogs("api.requests") as logs:
+            self._post(
+                "/api/accounts/login/",
+                data={"email": "foo@buzz.com", "password": "secret"},
+            )
+        record = logs.records[0]
+        self.assertEqual(record.endpoint, "AccountAPI.login")
+        self.assertEqual(record.data, {"email": "foo@buzz.com", "password": "****"})
+
+        with self.assertNoLogs("api.requests"):
+            self._get("/api/todos/", token=self.token)
+
+    def test_client_errors_not_logged_by_django(self):
+        with self.assertNoLogs(level="WARNING"):
+            response = self._get("/api/todos/missing/", token=self.token)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class TestStructuredLogging(SimpleTestCase):
+    def test_clean_sensitive_data(self):
+        data = {
+            "name": "todo",
+            "token": "abc",
+            "auth": {"new_password": "abc", "Access_Token": "abc"},
+            "items": [{"key": "abc", "monkey": "ok"}],
+        }
+
+        self.assertEqual(
+            clean_sensitive_data(data),
+            {
+                "name": "todo",
+                "token": "****",
+                "auth": {"new_password": "****", "Access_Token": "****"},
+                "items": [{"key": "****", "monkey": "ok"}],
+            },
+        )
+        self.assertEqual(data["token"], "abc")
+
+    def test_json_formatter(self):
+        record = logging.makeLogRecord(
+            {"name": "api.requests", "msg": "API call %s", "args": (1,), "status": 200}
+        )
+
+        entry = json.loads(JSONFormatter().format(record))
+        self.assertEqual(entry["message"], "API call 1")
+        self.assertEqual(entry["logger"], "api.requests")
+        self.assertEqual(entry["status"], 200)
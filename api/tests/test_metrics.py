@@ -0,0 +1,46 @@
+from http import HTTPStatus
+
+from django.test import override_settings
+
+from api.base import BaseTest
+from core.metrics import registry
+
+
+class TestMetrics(BaseTest):
+    def setUp(self):
+        self.user = self._create_account(
+            username="foo@buzz.com",
+        )
+        self.token = self._get_api_token(user=self.user)
+        registry.reset()
+
+    def test_server_timing(self):
+        response = self._post("/api/todos/", data={"name": "#1"}, token=self.token)
+
+        timing = response["Server-Timing"]
+        for phase in ["auth", "view", "db", "signals", "render", "total"]:
+            self.assertIn(f"{phase};dur=", timing)
+        self.assertRegex(timing, r'queries;desc="\d+"')
+
+    @override_settings(METRICS_TOKEN="scraper-secret")
+    def test_metrics_endpoint(self):
+        self._get("/api/todos/", token=self.token)
+
+        response = self._get("/api/metrics/", token=self.token)
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        response = self._get("/api/metrics/")
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+        response = self._get("/api/metrics/", token="scraper-secret")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        body = response.content.decode()
+        labels = 'route="GET todo-list",phase="total",quantile="0.99"'
+        self.assertIn(f"request_phase_seconds{{{labels}}}", body)
+        self.assertIn('request_queries_total{route="GET todo-list"}', body)
+        self.assertIn("token_cache_hit_ratio", body)
+        self.assertIn("realtime_connections_open", body)
+
+        self.user.is_superuser = True
+        self.user.save()
+        response = self._get("/api/metrics/", token=self.token)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
@@ -0,0 +1,59 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.test import override_settings
+
+from api.apis.todos import TodoAPI
+from api.base import BaseTest
+from api.methods import get_user_by_token_key
+from api.token_cache import token_cache
+from api.urls import api_router
+
+
+class TestQueryBudgets(BaseTest):
+    def setUp(self):
+        self.user = self._create_account(
+            username="foo@buzz.com",
+        )
+        self.token = self._get_api_token(user=self.user)
+
+    def test_every_handler_has_a_budget(self):
+        for _, viewset, _ in api_router.registry:
+            handlers = {"list", "retrieve", "create", "update", "delete"}
+            handlers.update(action.__name__ for action in viewset.get_extra_actions())
+            for name in handlers:
+                handler = getattr(viewset, name, None)
+                if handler is not None:
+                    self.assertIsNotNone(
+                        getattr(handler, "query_budget", None),
+                        f"{viewset.__name__}.{name}",
+                    )
+
+    @override_settings(TOKEN_CACHE_ENABLED=False)
+    def test_token_lookup_joins_user(self):
+        token_cache.clear()
+        with self.assertNumQueries(1):
+            user, _ = get_user_by_token_key(self.token)
+            self.assertEqual(user.username, "foo@buzz.com")
+
+    def test_register_within_budget(self):
+        res = self._post(
+            "/api/accounts/register/",
+            data={"email": "new@buzz.com", "password": "secret"},
+        )
+        self.assertEqual(res.status_code, HTTPStatus.OK)
+
+        res = self._post(
+            "/api/accounts/login/",
+            data={"email": "new@buzz.com", "password": "secret"},
+        )
+        self.assertEqual(res.status_code, HTTPStatus.OK)
+
+    @override_settings(API_QUERY_BUDGET_STRICT=False)
+    def test_exceeded_budget_is_logged(self):
+        with self.assertLogs("api.base", level="WARNING") as logs:
+            with mock.patch.object(TodoAPI.list, "query_budget", -1):
+                res = self._get("/api/todos/", token=self.token)
+
+        self.assertEqual(res.status_code, HTTPStatus.OK)
+        self.assertIn("TodoAPI.list ran", logs.output[0])
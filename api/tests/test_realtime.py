@@ -0,0 +1,239 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase, mock
+
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.db import transaction
+from django.test import SimpleTestCase, override_settings
+
+from api.base import BaseTest
+from core.asgi import application
+from todos import broadcast
+from todos.connections import Outbox, connections
+from todos.consumers import CLOSE_TIMEOUT
+from todos.models import Todo
+
+
+class TestTodoConsumer(BaseTest):
+    def setUp(self):
+        self.user = self._create_account(
+            username="foo@buzz.com",
+        )
+        self.token = self._get_api_token(user=self.user)
+
+    def _create_todo(self, name="#1 todo"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Todo.objects.create(user=self.user, name=name)
+
+    async def _connect(self, path=None, subprotocols=None):
+        communicator = WebsocketCommunicator(
+            application,
+            path or f"/ws/todos/?token={self.token}",
+            subprotocols=subprotocols,
+        )
+        connected, subprotocol = await communicator.connect()
+        return communicator, connected, subprotocol
+
+    async def test_rejects_missing_or_invalid_token(self):
+        for path in ["/ws/todos/", "/ws/todos/?token=invalid"]:
+            communicator, connected, _ = await self._connect(path)
+            self.assertFalse(connected)
+            await communicator.disconnect()
+
+    async def test_subprotocol_auth(self):
+        communicator, connected, subprotocol = await self._connect(
+            "/ws/todos/", subprotocols=["bearer", self.token]
+        )
+
+        self.assertTrue(connected)
+        self.assertEqual(subprotocol, "bearer")
+        await communicator.disconnect()
+
+    async def test_fan_out_to_user_sockets(self):
+        sockets = []
+        for _ in range(5):
+            communicator, connected, _ = await self._connect()
+            self.assertTrue(connected)
+            sockets.append(communicator)
+
+        other = await database_sync_to_async(self._create_account)(
+            username=self._create_fake_email()
+        )
+        other_token = await database_sync_to_async(self._get_api_token)(other)
+        outsider, _, _ = await self._connect(f"/ws/todos/?token={other_token}")
+
+        todo = await database_sync_to_async(self._create_todo)()
+
+        messages = await asyncio.gather(
+            *[communicator.receive_json_from() for communicator in sockets]
+        )
+        for message in messages:
+            self.assertEqual(message["type"], "todos_changed")
+            change = message["data"]["changes"][0]
+            self.assertEqual(change["type"], "todo_created")
+            self.assertEqual(change["message"]["id"], todo.uid)
+
+        self.assertTrue(await outsider.receive_nothing())
+
+        for communicator in sockets + [outsider]:
+            await communicator.disconnect()
+
+    async def test_rolled_back_write_is_not_broadcast(self):
+        communicator, _, _ = await self._connect()
+
+        def create_and_roll_back():
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    Todo.objects.create(user=self.user, name="#1 todo")
+                    transaction.set_rollback(True)
+
+        await database_sync_to_async(create_and_roll_back)()
+
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    async def test_events_are_coalesced(self):
+        communicator, _, _ = await self._connect()
+        collapsed = broadcast.dispatcher.stats()["collapsed"]
+
+        def toggle():
+            with self.captureOnCommitCallbacks(execute=True):
+                todo = Todo.objects.create(user=self.user, name="#1 todo")
+                for done in [True, False, True]:
+                    todo.done = done
+                    todo.save()
+
+                removed = Todo.objects.create(user=self.user, name="#2 todo")
+                removed.delete()
+            return todo
+
+        todo = await database_sync_to_async(toggle)()
+
+        message = await communicator.receive_json_from()
+        self.assertEqual(
+            message["data"]["changes"],
+            [
+                {"type": "todo_created", "message": broadcast.todo_payload(todo)},
+                {"type": "todo_deleted", "message": {"id": mock.ANY}},
+            ],
+        )
+        self.assertEqual(broadcast.dispatcher.stats()["collapsed"], collapsed + 4)
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    @override_settings(REALTIME_MAX_CONNECTIONS_PER_TOKEN=2)
+    async def test_connection_limit(self):
+        rejected = connections.stats()["rejected"]
+        sockets = []
+        for expected in [True, True, False]:
+            communicator, connected, _ = await self._connect()
+            self.assertEqual(connected, expected)
+            sockets.append(communicator)
+
+        self.assertEqual(connections.stats()["rejected"], rejected + 1)
+        await sockets[0].disconnect()
+
+        communicator, connected, _ = await self._connect()
+        self.assertTrue(connected)
+        for communicator in sockets[1:] + [communicator]:
+            await communicator.disconnect()
+
+    @override_settings(REALTIME_MAX_CONNECTIONS_PER_TOKEN=1)
+    async def test_failed_connect_frees_slot(self):
+        with mock.patch(
+            "channels.layers.InMemoryChannelLayer.group_add",
+            side_effect=ConnectionError,
+        ):
+            communicator = WebsocketCommunicator(
+                application, f"/ws/todos/?token={self.token}"
+            )
+            with self.assertRaises(ConnectionError):
+                await communicator.connect()
+
+        communicator, connected, _ = await self._connect()
+        self.assertTrue(connected)
+        await communicator.disconnect()
+
+    @override_settings(
+        REALTIME_HEARTBEAT_INTERVAL=0.05, REALTIME_HEARTBEAT_TIMEOUT=0.05
+    )
+    async def test_heartbeat(self):
+        communicator, _, _ = await self._connect()
+
+        self.assertEqual(await communicator.receive_json_from(), {"type": "ping"})
+        await communicator.send_json_to({"type": "pong"})
+        await communicator.send_json_to({"type": "ping"})
+        self.assertEqual(await communicator.receive_json_from(), {"type": "pong"})
+
+        # Stop answering, the server gives up after interval + timeout
+        while True:
+            message = await communicator.receive_output(timeout=1)
+            if message["type"] == "websocket.close":
+                break
+        self.assertEqual(message["code"], CLOSE_TIMEOUT)
+        await communicator.disconnect()
+
+    async def test_invalid_frames(self):
+        communicator, _, _ = await self._connect()
+
+        for frame in ["[]", '"ping"', "1", "null", "{not json"]:
+            await communicator.send_to(text_data=frame)
+            message = await communicator.receive_json_from()
+            self.assertEqual(message["code"], "invalid_frame")
+
+        # Still serving
+        await communicator.send_json_to({"type": "ping"})
+        self.assertEqual(await communicator.receive_json_from(), {"type": "pong"})
+        await communicator.disconnect()
+
+
+class TestBroadcastTasks(IsolatedAsyncioTestCase):
+    async def test_failed_task_is_kept_and_logged(self):
+        async def fail():
+            raise RuntimeError("boom")
+
+        with self.assertLogs("todos.broadcast", "ERROR"):
+            broadcast._spawn(fail())
+            self.assertEqual(len(broadcast._tasks), 1)
+            await asyncio.sleep(0.01)
+        self.assertFalse(broadcast._tasks)
+
+
+class TestOutbox(SimpleTestCase):
+    def _change(self, event_type, uid, **data):
+        return {"type": event_type, "data": {"id": uid, **data}}
+
+    def test_coalesce(self):
+        outbox = Outbox(maxsize=3, policy="coalesce")
+        outbox.put({"type": "ping"})
+        outbox.put(self._change("todo_created", "a", done=False))
+        outbox.put(self._change("todo_updated", "a", done=True))
+        outbox.put(self._change("todo_deleted", "b"))
+
+        self.assertEqual(
+            list(outbox._frames),
+            [
+                {"type": "ping"},
+                {
+                    "type": "todos_changed",
+                    "data": {
+                        "changes": [
+                            {
+                                "type": "todo_created",
+                                "message": {"id": "a", "done": True},
+                            }
+                        ]
+                    },
+                },
+                self._change("todo_deleted", "b"),
+            ],
+        )
+        self.assertEqual(outbox.dropped, 0)
+
+    def test_drop_oldest(self):
+        outbox = Outbox(maxsize=2, policy="drop_oldest")
+        for uid in "abc":
+            outbox.put(self._change("todo_created", uid))
+
+        self.assertEqual([frame["data"]["id"] for frame in outbox._frames], ["b", "c"])
+        self.assertEqual(outbox.dropped, 1)
@@ -0,0 +1,265 @@
+import json
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.conf import settings
+from django.core.cache import caches
+from django.test import override_settings
+
+from api import social
+from api.base import BaseTest
+from core.exceptions import APIServiceUnavailable
+
+FIXTURES = Path(__file__).parent / "fixtures"
+GOOGLE_USERINFO = {"email": "google@buzz.com", "verified_email": True}
+
+
+class StubProvider(BaseHTTPRequestHandler):
+    # Set by the tests: (status, body, delay in seconds)
+    response = (200, {}, 0)
+    hits = 0
+
+    def do_GET(self):
+        status, body, delay = type(self).response
+        type(self).hits += 1
+        time.sleep(delay)
+
+        content = json.dumps(body).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        except ConnectionError:
+            # The client timed out
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class TestGoogleAuth(BaseTest):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubProvider)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+        providers = {**settings.SOCIALACCOUNT_PROVIDERS}
+        providers["google"] = {
+            **providers["google"],
+            "USERINFO_URL": f"http://127.0.0.1:{cls.server.server_port}/userinfo",
+        }
+        cls.overrides = override_settings(
+            SOCIALACCOUNT_PROVIDERS=providers,
+            SOCIAL_HTTP_READ_TIMEOUT=0.2,
+            SOCIAL_HTTP_RETRIES=1,
+            SOCIAL_HTTP_CIRCUIT_FAILURES=2,
+        )
+        cls.overrides.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.overrides.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        StubProvider.response = (200, GOOGLE_USERINFO, 0)
+        StubProvider.hits = 0
+        social.clients.clear()
+        caches[settings.SOCIAL_USERINFO_CACHE_ALIAS].clear()
+
+    def _google_auth(self, access_token="access"):
+        return self._post(
+            "/api/accounts/google-auth/", data={"access_token": access_token}
+        )
+
+    def test_userinfo_cached(self):
+        res = self._google_auth()
+        self.assertEqual(res.status_code, HTTPStatus.OK)
+        token = res.data["token"]
+
+        res = self._google_auth()
+        self.assertEqual(res.data, {"token": token})
+        self.assertEqual(StubProvider.hits, 1)
+
+        self._google_auth(access_token="other")
+        self.assertEqual(StubProvider.hits, 2)
+
+    def test_unverified_email(self):
+        StubProvider.response = (200, {**GOOGLE_USERINFO, "verified_email": False}, 0)
+        res = self._google_auth()
+        self.assertEqual(res.status_code, HTTPStatus.BAD_REQUEST)
+
+        StubProvider.response = (200, {"email": "google@buzz.com"}, 0)
+        res = self._google_auth(access_token="other")
+        self.assertEqual(res.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_rejected_token(self):
+        StubProvider.response = (401, {"error": "invalid_token"}, 0)
+
+        res = self._google_auth()
+        self.assertEqual(res.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(social.clients["google"].breaker.state, "closed")
+
+    def test_circuit_opens_on_failures(self):
+        StubProvider.response = (503, {}, 0)
+
+        for _ in range(2):
+            res = self._google_auth()
+            self.assertEqual(res.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        # Each call is retried once
+        self.assertEqual(StubProvider.hits, 4)
+
+        res = self._google_auth()
+        self.assertEqual(res.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertEqual(StubProvider.hits, 4)
+        self.assertEqual(social.stats()["google_rejected"], 1)
+
+    def test_slow_provider_times_out(self):
+        StubProvider.response = (200, GOOGLE_USERINFO, 1)
+
+        start = time.monotonic()
+        res = self._google_auth()
+        self.assertEqual(res.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(StubProvider.hits, 1)
+
+    def test_circuit_half_open(self):
+        breaker = social.CircuitBreaker(failures=1, reset_timeout=0)
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, "half_open")
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+
+class TestGoogleIdToken(BaseTest):
+    def setUp(self):
+        self.private_key = (FIXTURES / "google_id_token_key.pem").read_text()
+        providers = {**settings.SOCIALACCOUNT_PROVIDERS}
+        providers["google"] = {
+            **providers["google"],
+            "APPS": [{"client_id": "client.apps.googleusercontent.com"}],
+        }
+        overrides = override_settings(SOCIALACCOUNT_PROVIDERS=providers)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.addCleanup(setattr, social, "google_jwks", social.google_jwks)
+        social.google_jwks = social.JWKSCache("google")
+
+        jwks = json.loads((FIXTURES / "google_jwks.json").read_text())
+        self.fetch = mock.Mock(return_value=(jwks, 3600))
+        social.google_jwks._fetch = self.fetch
+
+    def _id_token(self, key=None, kid="test-key-1", **claims):
+        now = int(time.time())
+        payload = {
+            "iss": "https://accounts.google.com",
+            "aud": "client.apps.googleusercontent.com",
+            "sub": "1234",
+            "email": "google@buzz.com",
+            "email_verified": True,
+            "iat": now,
+            "exp": now + 3600,
+            **claims,
+        }
+        return jwt.encode(
+            payload, key or self.private_key, algorithm="RS256", headers={"kid": kid}
+        )
+
+    def _google_auth(self, id_token):
+        return self._post("/api/accounts/google-auth/", data={"id_token": id_token})
+
+    def test_valid_id_token(self):
+        res = self._google_auth(self._id_token())
+        self.assertEqual(res.status_code, HTTPStatus.OK)
+        self.assertTrue(res.data["token"])
+
+        self._google_auth(self._id_token())
+        self.assertEqual(social.google_jwks.refreshes, 1)
+
+    def test_invalid_id_tokens(self):
+        other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        tokens = [
+            self._id_token(aud="other.apps.googleusercontent.com"),
+            self._id_token(iss="https://evil.example.com"),
+            self._id_token(exp=int(time.time()) - 3600),
+            self._id_token(email_verified=False),
+            self._id_token(key=other_key),
+            self._id_token(key=other_key, kid="unknown"),
+            "not-a-token",
+        ]
+        for id_token in tokens:
+            res = self._google_auth(id_token)
+            self.assertEqual(res.status_code, HTTPStatus.BAD_REQUEST)
+
+        # Unknown key ids refetch the keys at most once per interval
+        self.assertEqual(social.google_jwks.refreshes, 1)
+        with self.settings(SOCIAL_JWKS_MIN_REFRESH_INTERVAL=0):
+            self._google_auth(self._id_token(key=other_key, kid="unknown"))
+        self.assertEqual(social.google_jwks.refreshes, 2)
+
+    def test_requires_one_token(self):
+        res = self._post(
+            "/api/accounts/google-auth/",
+            data={"id_token": self._id_token(), "access_token": "access"},
+        )
+        self.assertEqual(res.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_single_refresh_at_a_time(self):
+        jwks = self.fetch.return_value
+
+        def slow_fetch():
+            time.sleep(0.1)
+            return jwks
+
+        self.fetch.side_effect = slow_fetch
+        threads = [
+            threading.Thread(target=social.google_jwks.get_key, args=("test-key-1",))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.fetch.call_count, 1)
+
+    def test_failed_refresh_keeps_keys(self):
+        jwks = social.google_jwks
+        key = jwks.get_key("test-key-1")
+        self.fetch.side_effect = APIServiceUnavailable()
+
+        # Expired, but the last attempt is too recent to try again
+        jwks._expires = 0
+        self.assertIs(jwks.get_key("test-key-1"), key)
+        self.assertEqual(self.fetch.call_count, 1)
+
+        with self.settings(SOCIAL_JWKS_MIN_REFRESH_INTERVAL=0):
+            self.assertIs(jwks.get_key("test-key-1"), key)
+        self.assertEqual(self.fetch.call_count, 2)
+        self.assertEqual(jwks.failures, 1)
+
+        # The failure counts against the interval too
+        self.assertIsNone(jwks.get_key("unknown"))
+        self.assertEqual(self.fetch.call_count, 2)
+        self.assertEqual(self._google_auth(self._id_token()).status_code, HTTPStatus.OK)
+
+    def test_failed_first_refresh(self):
+        self.fetch.side_effect = APIServiceUnavailable()
+
+        res = self._google_auth(self._id_token())
+        self.assertEqual(res.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
@@ -1,6 +1,33 @@
+import json
+import threading
+import time
+import traceback
+from datetime import timedelta
 from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from channels.db import database_sync_to_async
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from rest_framework.renderers import JSONRenderer
 
 from api.base import BaseTest
+from api.pagination import encode_timestamp_cursor
+from api.response_cache import todo_list_cache
+from api.serializers.todos import TodoSerializer
+from todos.models import Todo, TodoTombstone
+
+# Each alias stands in for another worker's process local cache
+WORKER_CACHES = {
+    alias: {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": alias,
+    }
+    for alias in ("default", "worker_a", "worker_b")
+}
 
 
 class TestTodo(BaseTest):
@@ -63,3 +90,448 @@ class TestTodo(BaseTest):
             token=self.token,
         )
         self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+
+    def _create_todos(self, count):
+        return [
+            Todo.objects.create(user=self.user, name=f"#{i} todo") for i in range(count)
+        ]
+
+    def test_list_pagination(self):
+        todos = self._create_todos(5)
+        expected = [todo.uid for todo in reversed(todos)]
+
+        seen = []
+        params = {"page_size": 2}
+        while True:
+            response = self._get("/api/todos/", data=params, token=self.token)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+
+            seen.extend(todo["id"] for todo in response.data["results"])
+            if not response.data["next"]:
+                break
+            params["cursor"] = response.data["next"]
+
+        self.assertEqual(seen, expected)
+
+    def test_list_invalid_cursor(self):
+        response = self._get("/api/todos/", data={"cursor": "%%%"}, token=self.token)
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(response.data["code"], "invalid_cursor")
+
+    def test_client_ids_are_object_ids(self):
+        response = self._post(
+            "/api/todos/", token=self.token, data={"id": "zzz", "name": "#1 todo"}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+        response = self._post(
+            "/api/todos/bulk/",
+            token=self.token,
+            data=[{"op": "create", "id": "zzz", "name": "#1 todo"}],
+        )
+        self.assertEqual(response.data[0]["status"], HTTPStatus.BAD_REQUEST)
+        self.assertFalse(Todo.objects.filter(uid="zzz").exists())
+
+    def test_list_cursor_past_legacy_id(self):
+        # Rows from before ids were validated still page through
+        Todo.objects.create(user=self.user, uid="zzz", name="#1 todo")
+        todo = self._create_todos(1)[0]
+
+        response = self._get("/api/todos/", data={"page_size": 1}, token=self.token)
+        self.assertEqual(response.data["results"][0]["id"], "zzz")
+
+        response = self._get(
+            "/api/todos/",
+            data={"page_size": 1, "cursor": response.data["next"]},
+            token=self.token,
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.data["results"][0]["id"], todo.uid)
+
+    def test_list_fields(self):
+        self._create_todos(2)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self._get(
+                "/api/todos/", data={"fields": "id,done"}, token=self.token
+            )
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotIn('"description"', queries[-1]["sql"])
+        self.assertEqual(set(response.data[0]), {"id", "done"})
+
+        response = self._get("/api/todos/", data={"fields": "user"}, token=self.token)
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_bulk(self):
+        updated, deleted = self._create_todos(2)
+
+        with mock.patch("todos.broadcast.send") as send:
+            response = self._post(
+                "/api/todos/bulk/",
+                token=self.token,
+                data=[
+                    {"op": "create", "name": "#3 todo"},
+                    {"op": "create"},
+                    {"op": "update", "id": updated.uid, "done": True},
+                    {"op": "delete", "id": deleted.uid},
+                    {"op": "delete", "id": "missing"},
+                    {"op": "archive", "id": updated.uid},
+                ],
+            )
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            [result["status"] for result in response.data],
+            [
+                HTTPStatus.OK,
+                HTTPStatus.BAD_REQUEST,
+                HTTPStatus.OK,
+                HTTPStatus.NO_CONTENT,
+                HTTPStatus.NOT_FOUND,
+                HTTPStatus.BAD_REQUEST,
+            ],
+        )
+        self.assertTrue(Todo.objects.filter(name="#3 todo").exists())
+        self.assertTrue(Todo.objects.get(uid=updated.uid).done)
+        self.assertFalse(Todo.objects.filter(uid=deleted.uid).exists())
+
+        # One coalesced event for the whole batch
+        send.assert_called_once()
+        group, event = send.call_args.args
+        self.assertEqual(event["type"], "todos_changed")
+        self.assertEqual(
+            [change["type"] for change in event["message"]["changes"]],
+            ["todo_created", "todo_updated", "todo_deleted"],
+        )
+
+    def test_bulk_other_user(self):
+        other = self._create_account(username=self._create_fake_email())
+        todo = Todo.objects.create(user=other, name="#1 todo")
+
+        response = self._post(
+            "/api/todos/bulk/",
+            token=self.token,
+            data=[{"op": "delete", "id": todo.uid}],
+        )
+
+        self.assertEqual(response.data[0]["status"], HTTPStatus.NOT_FOUND)
+        self.assertTrue(Todo.objects.filter(uid=todo.uid).exists())
+
+    def test_bulk_invalid_ids(self):
+        todo = self._create_todos(1)[0]
+
+        response = self._post(
+            "/api/todos/bulk/",
+            token=self.token,
+            data=[
+                {"op": "delete", "id": {"uid": todo.uid}},
+                {"op": "update", "id": [todo.uid], "done": True},
+                {"op": "delete", "id": None},
+                {"op": "delete"},
+                "delete",
+            ],
+        )
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            {result["status"] for result in response.data}, {HTTPStatus.BAD_REQUEST}
+        )
+        self.assertFalse(Todo.objects.get(uid=todo.uid).done)
+
+    def test_bulk_invalid_payload(self):
+        response = self._post(
+            "/api/todos/bulk/", token=self.token, data={"op": "create"}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_changes(self):
+        kept, updated, deleted = self._create_todos(3)
+
+        response = self._get("/api/todos/changes/", token=self.token)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(len(response.data["updated"]), 3)
+        cursor = response.data["cursor"]
+
+        # Rows inside the overlap come back again, the cursor doesn't move
+        response = self._get(
+            "/api/todos/changes/", data={"since": cursor}, token=self.token
+        )
+        self.assertEqual(len(response.data["updated"]), 3)
+        self.assertEqual(response.data["cursor"], cursor)
+
+        with self.settings(TODO_CHANGES_OVERLAP=0):
+            response = self._get(
+                "/api/todos/changes/", data={"since": cursor}, token=self.token
+            )
+        self.assertEqual(
+            [todo["id"] for todo in response.data["updated"]], [deleted.uid]
+        )
+        self.assertEqual(response.data["cursor"], cursor)
+
+        updated.done = True
+        updated.save()
+        deleted.delete()
+        created = Todo.objects.create(user=self.user, name="#4 todo")
+
+        response = self._get(
+            "/api/todos/changes/", data={"since": cursor}, token=self.token
+        )
+        self.assertLessEqual(
+            {updated.uid, created.uid},
+            {todo["id"] for todo in response.data["updated"]},
+        )
+        self.assertEqual(response.data["deleted"], [deleted.uid])
+
+    def test_changes_late_commit(self):
+        todo = Todo.objects.create(user=self.user, name="#1 todo")
+        response = self._get("/api/todos/changes/", token=self.token)
+        cursor = response.data["cursor"]
+
+        # Committed after the read above, but stamped before the cursor
+        late = Todo.objects.create(user=self.user, name="#2 todo")
+        Todo.objects.filter(uid=late.uid).update(
+            updated_on=todo.updated_on - timedelta(seconds=1)
+        )
+
+        response = self._get(
+            "/api/todos/changes/", data={"since": cursor}, token=self.token
+        )
+        self.assertIn(late.uid, {todo["id"] for todo in response.data["updated"]})
+        self.assertEqual(response.data["cursor"], cursor)
+
+    def test_changes_expired_cursor(self):
+        todo = Todo.objects.create(user=self.user, name="#1 todo")
+        todo.delete()
+        TodoTombstone.objects.update(created_on=now() - timedelta(days=31))
+
+        response = self._get(
+            "/api/todos/changes/",
+            data={"since": encode_timestamp_cursor(now() - timedelta(days=31))},
+            token=self.token,
+        )
+        self.assertEqual(response.status_code, HTTPStatus.GONE)
+
+        call_command("purge_todo_tombstones", stdout=StringIO())
+        self.assertFalse(TodoTombstone.objects.exists())
+
+    def test_list_etag(self):
+        self._create_todos(2)
+
+        response = self._get("/api/todos/", token=self.token)
+        etag = response["ETag"]
+
+        response = self._get(
+            "/api/todos/", headers={"HTTP_IF_NONE_MATCH": etag}, token=self.token
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+        # Different query, different representation
+        response = self._get(
+            "/api/todos/",
+            data={"fields": "id"},
+            headers={"HTTP_IF_NONE_MATCH": etag},
+            token=self.token,
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        self._create_todos(1)
+        response = self._get(
+            "/api/todos/", headers={"HTTP_IF_NONE_MATCH": etag}, token=self.token
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(len(response.data), 3)
+
+    def test_list_etag_late_write(self):
+        todos = self._create_todos(2)
+        etag = self._get("/api/todos/", token=self.token)["ETag"]
+
+        # A write that committed late carries an updated_on older than the
+        # newest one, it must still move the tag
+        todos[0].done = True
+        with mock.patch("django.utils.timezone.now", return_value=todos[0].created_on):
+            todos[0].save()
+        response = self._get(
+            "/api/todos/", headers={"HTTP_IF_NONE_MATCH": etag}, token=self.token
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        etag = response["ETag"]
+        self._post(
+            "/api/todos/bulk/",
+            data=[{"op": "update", "id": todos[1].uid, "done": True}],
+            token=self.token,
+        )
+        response = self._get(
+            "/api/todos/", headers={"HTTP_IF_NONE_MATCH": etag}, token=self.token
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(all(todo["done"] for todo in response.data))
+
+    def test_list_etag_across_workers(self):
+        self._create_todos(2)
+
+        with self.settings(CACHES=WORKER_CACHES, TODO_CACHE_ALIAS="worker_a"):
+            etag = self._get("/api/todos/", token=self.token)["ETag"]
+
+        with self.settings(CACHES=WORKER_CACHES, TODO_CACHE_ALIAS="worker_b"):
+            self._post("/api/todos/", data={"name": "#3 todo"}, token=self.token)
+
+        with self.settings(CACHES=WORKER_CACHES, TODO_CACHE_ALIAS="worker_a"):
+            response = self._get(
+                "/api/todos/", headers={"HTTP_IF_NONE_MATCH": etag}, token=self.token
+            )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(len(response.data), 3)
+
+    def test_detail_etag(self):
+        todo = self._create_todos(1)[0]
+        path = f"/api/todos/{todo.uid}/"
+
+        etag = self._get(path, token=self.token)["ETag"]
+        response = self._get(
+            path, headers={"HTTP_IF_NONE_MATCH": etag}, token=self.token
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+        response = self._put(
+            path,
+            data={"done": True},
+            headers={"HTTP_IF_MATCH": etag},
+            token=self.token,
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+        # Stale tag
+        response = self._delete(path, headers={"HTTP_IF_MATCH": etag}, token=self.token)
+        self.assertEqual(response.status_code, HTTPStatus.PRECONDITION_FAILED)
+        self.assertTrue(Todo.objects.filter(uid=todo.uid).exists())
+
+    def test_detail_other_user(self):
+        other = self._create_account(username=self._create_fake_email())
+        todo = Todo.objects.create(user=other, name="#1 todo")
+
+        response = self._get(f"/api/todos/{todo.uid}/", token=self.token)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_error_paths(self):
+        from_exception = traceback.TracebackException.from_exception
+        with mock.patch(
+            "api.base.traceback.TracebackException.from_exception",
+            wraps=from_exception,
+        ) as format_traceback:
+            response = self._get("/api/todos/missing/", token=self.token)
+            self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+            self.assertEqual(response.data["code"], "not_found")
+
+            response = self._get("/api/todos/", token="invalid")
+            self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+            format_traceback.assert_not_called()
+
+            with mock.patch(
+                "api.apis.todos.TodoAPI.list", side_effect=RuntimeError("boom")
+            ):
+                response = self._get("/api/todos/", token=self.token)
+            self.assertEqual(response.status_code, HTTPStatus.INTERNAL_SERVER_ERROR)
+            format_traceback.assert_called_once()
+
+    def test_list_cache(self):
+        self._create_todos(2)
+        self._get("/api/todos/", token=self.token)
+
+        hits = todo_list_cache.stats()["hits"]
+        # Only the generation is read
+        with self.assertNumQueries(1):
+            response = self._get("/api/todos/", token=self.token)
+
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(todo_list_cache.stats()["hits"], hits + 1)
+
+        # Writes move the generation, so the next read recomputes
+        todo = Todo.objects.get(uid=response.data[0]["id"])
+        todo.delete()
+        response = self._get("/api/todos/", token=self.token)
+        self.assertEqual(len(response.data), 1)
+
+    def test_list_cache_across_workers(self):
+        todo = self._create_todos(2)[0]
+
+        with self.settings(CACHES=WORKER_CACHES, TODO_CACHE_ALIAS="worker_a"):
+            self._get("/api/todos/", token=self.token)
+
+        with self.settings(CACHES=WORKER_CACHES, TODO_CACHE_ALIAS="worker_b"):
+            self._put(f"/api/todos/{todo.uid}/", data={"done": True}, token=self.token)
+
+        with self.settings(CACHES=WORKER_CACHES, TODO_CACHE_ALIAS="worker_a"):
+            response = self._get("/api/todos/", token=self.token)
+        self.assertEqual(
+            {row["id"]: row["done"] for row in response.data}[todo.uid], True
+        )
+
+    def test_list_cache_single_recompute(self):
+        key = self._create_fake_email()
+        todo_list_cache.cache.add(f"todos:list:{key}:lock", 1)
+
+        def finish_recompute():
+            time.sleep(0.05)
+            todo_list_cache.cache.set(f"todos:list:{key}", ["cached"])
+
+        thread = threading.Thread(target=finish_recompute)
+        thread.start()
+        compute = mock.Mock(return_value=["recomputed"])
+        data = todo_list_cache.get_or_set(key, compute)
+        thread.join()
+
+        self.assertEqual(data, ["cached"])
+        compute.assert_not_called()
+
+    def test_fast_serializer_output(self):
+        Todo.objects.create(user=self.user, name="#1 todo", description=None)
+        Todo.objects.create(
+            user=self.user, name='#2 tödo "quoted"', description="</b>", done=True
+        )
+        queryset = Todo.objects.filter(user=self.user)
+        renderer = JSONRenderer()
+
+        for fields in [None, ["done", "id"], ["description"]]:
+            expected = TodoSerializer(queryset, many=True, fields=fields).data
+            fast = TodoSerializer.serialize_values(
+                TodoSerializer.values_queryset(queryset, fields), fields
+            )
+            self.assertEqual(renderer.render(fast), renderer.render(expected))
+
+    def test_export(self):
+        self._create_todos(3)
+
+        response = self._get("/api/todos/export/", token=self.token)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])["name"], "#2 todo")
+
+        response = self._get(
+            "/api/todos/export/",
+            data={"output": "csv", "fields": "name,done"},
+            token=self.token,
+        )
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(rows[:2], ["name,done", "#2 todo,False"])
+
+        response = self._get(
+            "/api/todos/export/", data={"output": "xml"}, token=self.token
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    async def test_export_asgi(self):
+        await database_sync_to_async(self._create_todos)(3)
+
+        response = await self.async_client.get(
+            "/api/todos/export/", headers={"Authorization": f"bearer {self.token}"}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.is_async)
+        lines = [line async for line in response.streaming_content]
+        self.assertEqual(len(lines), 3)
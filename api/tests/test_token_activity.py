@@ -0,0 +1,82 @@
+import threading
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import override_settings
+from django.utils.timezone import now
+
+from api.base import BaseTest
+from api.models import TokenKey
+from api.token_activity import TokenActivityRecorder, token_activity
+from api.token_cache import token_cache
+
+
+class TestTokenActivity(BaseTest):
+    def setUp(self):
+        self.user = self._create_account(
+            username="foo@buzz.com",
+        )
+        self.token = self._get_api_token(user=self.user)
+        token_activity.flush()
+        token_cache.clear()
+
+    def test_requests_are_buffered(self):
+        self._get("/api/accounts/", token=self.token)
+        with self.assertNumQueries(0):
+            self._get("/api/accounts/", token=self.token)
+
+        self.assertEqual(token_activity.pending(), 1)
+        self.assertIsNone(TokenKey.objects.get(key=self.token).last_used)
+
+        self.assertEqual(token_activity.flush(), 1)
+        self.assertIsNotNone(TokenKey.objects.get(key=self.token).last_used)
+
+    def test_recent_activity_is_skipped(self):
+        TokenKey.objects.filter(key=self.token).update(last_used=now())
+
+        self._get("/api/accounts/", token=self.token)
+
+        self.assertEqual(token_activity.pending(), 0)
+
+    @override_settings(TOKEN_ACTIVITY_BATCH_SIZE=2)
+    def test_full_batch_wakes_flusher(self):
+        other = self._create_account(username=self._create_fake_email())
+        other_token = self._get_api_token(user=other)
+
+        with mock.patch.object(token_activity, "wake") as wake:
+            self._get("/api/accounts/", token=self.token)
+            wake.assert_not_called()
+
+            # Only the token lookup, nothing is written on the request thread
+            with self.assertNumQueries(1):
+                self._get("/api/accounts/", token=other_token)
+            wake.assert_called_once()
+
+        self.assertEqual(token_activity.pending(), 2)
+
+    def test_failed_flush_is_retried(self):
+        self._get("/api/accounts/", token=self.token)
+
+        with mock.patch(
+            "django.db.models.QuerySet.update", side_effect=OperationalError("locked")
+        ):
+            with self.assertRaises(OperationalError):
+                token_activity.flush()
+        self.assertEqual(token_activity.pending(), 1)
+
+        self.assertEqual(token_activity.flush(), 1)
+        self.assertIsNotNone(TokenKey.objects.get(key=self.token).last_used)
+
+    @override_settings(
+        TOKEN_ACTIVITY_BACKGROUND_FLUSH=True, TOKEN_ACTIVITY_FLUSH_INTERVAL=60
+    )
+    def test_background_flush(self):
+        recorder = TokenActivityRecorder()
+        flushed = threading.Event()
+        token_key = TokenKey.objects.get(key=self.token)
+
+        with mock.patch.object(recorder, "flush", side_effect=flushed.set):
+            recorder.record(token_key)
+            self.assertEqual(recorder.pending(), 1)
+            recorder.wake()
+            self.assertTrue(flushed.wait(5))
@@ -0,0 +1,100 @@
+from http import HTTPStatus
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+
+from api.base import BaseTest
+from api.methods import deactivate_users
+from api.models import TokenKey
+from api.token_cache import token_cache
+
+
+class TestTokenCache(BaseTest):
+    def setUp(self):
+        self.user = self._create_account(
+            username="foo@buzz.com",
+        )
+        self.token = self._get_api_token(user=self.user)
+        token_cache.clear()
+
+    def test_cached_after_first_request(self):
+        res = self._get("/api/accounts/", token=self.token)
+        self.assertEqual(res.status_code, HTTPStatus.OK)
+
+        hits = token_cache.stats()["local_hits"]
+        with self.assertNumQueries(0):
+            res = self._get("/api/accounts/", token=self.token)
+
+        self.assertEqual(res.status_code, HTTPStatus.OK)
+        self.assertEqual(token_cache.stats()["local_hits"], hits + 1)
+
+    def test_shared_cache_tier(self):
+        self._get("/api/accounts/", token=self.token)
+        token_cache.clear()
+
+        shared_hits = token_cache.stats()["shared_hits"]
+        res = self._get("/api/accounts/", token=self.token)
+
+        self.assertEqual(res.status_code, HTTPStatus.OK)
+        self.assertEqual(token_cache.stats()["shared_hits"], shared_hits + 1)
+
+    def test_invalidated_on_logout(self):
+        self._get("/api/accounts/", token=self.token)
+
+        res = self._get("/api/accounts/logout/", token=self.token)
+        self.assertEqual(res.status_code, HTTPStatus.NO_CONTENT)
+
+        res = self._get("/api/accounts/", token=self.token)
+        self.assertEqual(res.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_invalidated_on_deactivate(self):
+        self._get("/api/accounts/", token=self.token)
+
+        TokenKey.objects.get(key=self.token).deactivate()
+
+        res = self._get("/api/accounts/", token=self.token)
+        self.assertEqual(res.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_invalidated_on_queryset_deactivate(self):
+        self._get("/api/accounts/", token=self.token)
+
+        TokenKey.objects.filter(user=self.user).deactivate()
+
+        res = self._get("/api/accounts/", token=self.token)
+        self.assertEqual(res.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_invalidated_on_queryset_delete(self):
+        self._get("/api/accounts/", token=self.token)
+
+        TokenKey.objects.filter(user=self.user).delete()
+
+        res = self._get("/api/accounts/", token=self.token)
+        self.assertEqual(res.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_invalidated_on_user_deactivate(self):
+        self._get("/api/accounts/", token=self.token)
+
+        deactivate_users(User.objects.filter(pk=self.user.pk))
+
+        res = self._get("/api/accounts/", token=self.token)
+        self.assertEqual(res.status_code, HTTPStatus.FORBIDDEN)
+
+    @override_settings(TOKEN_CACHE_TTL=300, TOKEN_CACHE_LOCAL_TTL=10)
+    def test_shared_ttl_capped_on_local_backend(self):
+        self.assertEqual(token_cache.shared_ttl, 10)
+
+        caches = {
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "shared": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+        }
+        with self.settings(CACHES=caches, TOKEN_CACHE_ALIAS="shared"):
+            self.assertEqual(token_cache.shared_ttl, 300)
+
+    def test_invalidated_on_user_change(self):
+        self._get("/api/accounts/", token=self.token)
+
+        self.user.first_name = "Foo"
+        self.user.save()
+
+        res = self._get("/api/accounts/", token=self.token)
+        self.assertEqual(res.data["first_name"], "Foo")
@@ -0,0 +1,111 @@
+import atexit
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, models
+from django.db.models import Case, Value, When
+from django.utils.timezone import now
+
+log = logging.getLogger(__name__)
+
+
+class TokenActivityRecorder:
+    """
+    Collects TokenKey.last_used timestamps in memory and writes them back in a
+    single UPDATE from a background thread, every flush interval or as soon
+    as the batch is full. Requests only ever touch the buffer.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def _buffer(self, token_key) -> bool:
+        timestamp = now()
+        min_interval = timedelta(seconds=settings.TOKEN_ACTIVITY_MIN_INTERVAL)
+        if token_key.last_used and timestamp - token_key.last_used < min_interval:
+            return False
+
+        # The instance may be shared through the token cache, so this also
+        # keeps later requests in this process from recording again
+        token_key.last_used = timestamp
+
+        with self._lock:
+            self._pending[token_key.key] = timestamp
+            self._start()
+            return len(self._pending) >= settings.TOKEN_ACTIVITY_BATCH_SIZE
+
+    def record(self, token_key):
+        if self._buffer(token_key):
+            self.wake()
+
+    async def arecord(self, token_key):
+        self.record(token_key)
+
+    def wake(self):
+        self._wakeup.set()
+
+    def _start(self):
+        if not settings.TOKEN_ACTIVITY_BACKGROUND_FLUSH:
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="token-activity", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(settings.TOKEN_ACTIVITY_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            # This thread's connection outlives requests, apply CONN_MAX_AGE
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                # Database errors put the batch back for the next round
+                log.exception("Failed to flush token activity")
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        from api.models import TokenKey
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return 0
+
+        try:
+            return TokenKey.objects.filter(key__in=pending.keys()).update(
+                last_used=Case(
+                    *[
+                        When(key=key, then=Value(value))
+                        for key, value in pending.items()
+                    ],
+                    output_field=models.DateTimeField(),
+                )
+            )
+        except DatabaseError:
+            # Back into the buffer for the next flush, newer timestamps win
+            with self._lock:
+                self._pending = {**pending, **self._pending}
+            raise
+
+
+token_activity = TokenActivityRecorder()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        token_activity.flush()
+    except DatabaseError:
+        log.exception("Failed to flush token activity on shutdown")
@@ -0,0 +1,158 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.cache import is_process_local
+
+
+class TokenCache:
+    """
+    Two tier cache of resolved tokens: a bounded per-process LRU in front of
+    Django's cache framework. Entries are ``(user, token_key)`` tuples.
+
+    A revocation only clears the local tier of its own process. On a process
+    local backend the shared tier is no different, so it keeps entries no
+    longer than the local tier does.
+    """
+
+    KEY_PREFIX = "token"
+
+    def __init__(self):
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "local_hits": 0,
+            "shared_hits": 0,
+            "misses": 0,
+            "invalidations": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return settings.TOKEN_CACHE_ENABLED
+
+    @property
+    def shared(self):
+        return caches[settings.TOKEN_CACHE_ALIAS]
+
+    @property
+    def shared_ttl(self) -> int:
+        if is_process_local(self.shared):
+            return min(settings.TOKEN_CACHE_TTL, settings.TOKEN_CACHE_LOCAL_TTL)
+        return settings.TOKEN_CACHE_TTL
+
+    def _cache_key(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return f"{self.KEY_PREFIX}:{digest}"
+
+    def _incr(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _get_local(self, cache_key: str):
+        with self._lock:
+            entry = self._local.get(cache_key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._local[cache_key]
+                return None
+
+            self._local.move_to_end(cache_key)
+            self._stats["local_hits"] += 1
+            return value
+
+    def _set_local(self, cache_key: str, value):
+        expires_at = time.monotonic() + settings.TOKEN_CACHE_LOCAL_TTL
+        with self._lock:
+            self._local[cache_key] = (expires_at, value)
+            self._local.move_to_end(cache_key)
+            while len(self._local) > settings.TOKEN_CACHE_LOCAL_MAXSIZE:
+                self._local.popitem(last=False)
+
+    def get(self, key: str):
+        if not self.enabled:
+            return None
+
+        cache_key = self._cache_key(key)
+        value = self._get_local(cache_key)
+        if value is not None:
+            return value
+
+        value = self.shared.get(cache_key)
+        if value is None:
+            self._incr("misses")
+            return None
+
+        self._incr("shared_hits")
+        self._set_local(cache_key, value)
+        return value
+
+    async def aget(self, key: str):
+        if not self.enabled:
+            return None
+
+        cache_key = self._cache_key(key)
+        value = self._get_local(cache_key)
+        if value is not None:
+            return value
+
+        value = await self.shared.aget(cache_key)
+        if value is None:
+            self._incr("misses")
+            return None
+
+        self._incr("shared_hits")
+        self._set_local(cache_key, value)
+        return value
+
+    def set(self, key: str, value):
+        if not self.enabled:
+            return
+
+        cache_key = self._cache_key(key)
+        self.shared.set(cache_key, value, self.shared_ttl)
+        self._set_local(cache_key, value)
+
+    async def aset(self, key: str, value):
+        if not self.enabled:
+            return
+
+        cache_key = self._cache_key(key)
+        await self.shared.aset(cache_key, value, self.shared_ttl)
+        self._set_local(cache_key, value)
+
+    def invalidate(self, *keys: str):
+        cache_keys = [self._cache_key(key) for key in keys]
+        if not cache_keys:
+            return
+
+        with self._lock:
+            for cache_key in cache_keys:
+                self._local.pop(cache_key, None)
+            self._stats["invalidations"] += len(cache_keys)
+
+        self.shared.delete_many(cache_keys)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["local_size"] = len(self._local)
+
+        lookups = stats["local_hits"] + stats["shared_hits"] + stats["misses"]
+        hits = stats["local_hits"] + stats["shared_hits"]
+        stats["hit_ratio"] = hits / lookups if lookups else 0.0
+        return stats
+
+
+token_cache = TokenCache()
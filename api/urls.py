@@ -1,13 +1,19 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from api.apis import accounts, todos
+from api.apis import accounts, async_accounts, async_todos, metrics, todos
 
 api_router = routers.DefaultRouter()
 api_router.register(r"accounts", accounts.AccountAPI, basename="account")
 api_router.register(r"todos", todos.TodoAPI, basename="todo")
+api_router.register(r"metrics", metrics.MetricsAPI, basename="metrics")
 
 
 urlpatterns = [
     path("api/", include(api_router.urls)),
+    # Async views for the ASGI deployment, same contract as /api/todos/
+    path("api/async/todos/", async_todos.AsyncTodoListAPI.as_view()),
+    path("api/async/todos/<str:pk>/", async_todos.AsyncTodoDetailAPI.as_view()),
+    path("api/async/accounts/login/", async_accounts.AsyncLoginAPI.as_view()),
+    path("api/async/accounts/register/", async_accounts.AsyncRegisterAPI.as_view()),
 ]
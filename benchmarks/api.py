@@ -0,0 +1,142 @@
+import asyncio
+import json
+from itertools import count, cycle
+
+from django.test import Client, override_settings
+
+from benchmarks.base import (
+    ameasure,
+    asgi_request,
+    load,
+    measure,
+    seed_accounts,
+    seed_todos,
+)
+
+DEFAULT_USERS = 10
+DEFAULT_SIZES = [100, 1000]
+REQUESTS_PER_REPEAT = 20
+CONCURRENCY = 20
+
+
+def _operations(accounts, requests):
+    """
+    (method, path, body) factories per endpoint, each call moving on to the
+    next seeded user so caches see a realistic mix.
+    """
+    users = cycle(accounts)
+    sequence = count()
+    # Fresh rows to update and delete, created up front so the deletes
+    # don't pay for the inserts
+    pools = {user.id: iter(seed_todos(user, requests * 2 + 2)) for user, _ in accounts}
+
+    def auth():
+        _, token = next(users)
+        return token, "GET", "/api/accounts/", None
+
+    def list_todos():
+        _, token = next(users)
+        return token, "GET", "/api/todos/", None
+
+    def create():
+        _, token = next(users)
+        return token, "POST", "/api/todos/", {"name": f"#{next(sequence)} todo"}
+
+    def update():
+        user, token = next(users)
+        todo = next(pools[user.id])
+        return token, "PUT", f"/api/todos/{todo.uid}/", {"done": not todo.done}
+
+    def delete():
+        user, token = next(users)
+        return token, "DELETE", f"/api/todos/{next(pools[user.id]).uid}/", None
+
+    return {
+        "auth": auth,
+        "list": list_todos,
+        "create": create,
+        "update": update,
+        "delete": delete,
+    }
+
+
+def _bench_wsgi(accounts, repeat: int) -> dict:
+    client = Client(SERVER_NAME="localhost")
+    requests = repeat * REQUESTS_PER_REPEAT
+    results = {}
+    for name, operation in _operations(accounts, requests).items():
+
+        def request():
+            token, method, path, body = operation()
+            response = getattr(client, method.lower())(
+                path,
+                body or "",
+                content_type="application/json",
+                HTTP_AUTHORIZATION=f"bearer {token}",
+            )
+            assert response.status_code < 300, (name, response.status_code)
+
+        results[name] = measure(request, repeat=requests)
+    return results
+
+
+def _bench_asgi(accounts, repeat: int) -> dict:
+    from core.asgi import application
+
+    requests = repeat * REQUESTS_PER_REPEAT
+    operations = _operations(accounts, requests)
+
+    async def bench():
+        results = {}
+        for name, operation in operations.items():
+
+            async def request():
+                token, method, path, body = operation()
+                status, content, elapsed = await asgi_request(
+                    application,
+                    method,
+                    path,
+                    headers={
+                        "Authorization": f"bearer {token}",
+                        "Content-Type": "application/json",
+                    },
+                    body=json.dumps(body).encode() if body else b"",
+                )
+                assert status < 300, (name, status, content)
+                return status, content, elapsed
+
+            results[name] = await ameasure(request, repeat=requests)
+
+        async def concurrent_list():
+            token, method, path, _ = operations["list"]()
+            return await asgi_request(
+                application, method, path, headers={"Authorization": f"bearer {token}"}
+            )
+
+        results["list_concurrent"] = await load(
+            concurrent_list, total=requests * 5, concurrency=CONCURRENCY
+        )
+        return results
+
+    return asyncio.run(bench())
+
+
+def run(repeat: int = 5, sizes=None, users=None, **options) -> dict:
+    """
+    Seeds ``users`` accounts with ``size`` todos each and times token auth and
+    the todo list/create/update/delete endpoints through the test client
+    (WSGI) and the ASGI application, with and without the list cache.
+    """
+    users = users or DEFAULT_USERS
+    results = {}
+    for size in sizes or DEFAULT_SIZES:
+        accounts = seed_accounts(f"api-{size}", users, size)
+        results[size] = {"users": users, "todos_per_user": size}
+        for cache in [True, False]:
+            with override_settings(TODO_LIST_CACHE_ENABLED=cache):
+                results[size]["cached" if cache else "uncached"] = {
+                    "wsgi": _bench_wsgi(accounts, repeat),
+                    "asgi": _bench_asgi(accounts, repeat),
+                }
+
+    return results
@@ -0,0 +1,44 @@
+import asyncio
+
+from django.test import override_settings
+
+from benchmarks.base import asgi_request, create_user, load, seed_todos
+
+TOTAL_REQUESTS = 500
+CONCURRENCY = 50
+TODOS_PER_USER = 100
+
+
+def run(repeat: int = 5, sizes=None, **options) -> dict:
+    """
+    Sync DRF TodoAPI vs the async views, both served through core.asgi
+    with the same concurrent load. The list cache is off so both stacks
+    do the same database work.
+    """
+    from core.asgi import application
+
+    user, token = create_user("async-views@bench.local")
+    todo = seed_todos(user, TODOS_PER_USER)[0]
+    headers = {"Authorization": f"bearer {token}"}
+
+    paths = {
+        "list": ("/api/todos/", "/api/async/todos/"),
+        "retrieve": (f"/api/todos/{todo.uid}/", f"/api/async/todos/{todo.uid}/"),
+    }
+
+    async def bench(path):
+        async def request():
+            return await asgi_request(application, "GET", path, headers=headers)
+
+        await load(request, total=CONCURRENCY, concurrency=CONCURRENCY)
+        return await load(request, total=TOTAL_REQUESTS, concurrency=CONCURRENCY)
+
+    results = {}
+    with override_settings(TODO_LIST_CACHE_ENABLED=False):
+        for name, (sync_path, async_path) in paths.items():
+            results[name] = {
+                "sync": asyncio.run(bench(sync_path)),
+                "async": asyncio.run(bench(async_path)),
+            }
+
+    return results
@@ -0,0 +1,168 @@
+import asyncio
+import statistics
+import time
+
+from django.contrib.auth.models import User
+
+from api.methods import get_token_key
+from todos.models import Todo
+
+
+def summarize(timings: list[float]) -> dict:
+    timings = sorted(timings)
+    return {
+        "runs": len(timings),
+        "min_ms": timings[0] * 1000,
+        "median_ms": statistics.median(timings) * 1000,
+        "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000,
+        "max_ms": timings[-1] * 1000,
+    }
+
+
+def measure(fn, repeat: int = 5, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        fn()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    return summarize(timings)
+
+
+def create_user(username: str) -> tuple[User, str]:
+    user = User.objects.create_user(email=username, username=username)
+    return user, get_token_key(user=user).key
+
+
+def seed_todos(user: User, count: int, batch_size: int = 5000) -> list[Todo]:
+    return Todo.objects.bulk_create(
+        [
+            Todo(user=user, name=f"#{i} todo", description="x" * 40, done=i % 2 == 0)
+            for i in range(count)
+        ],
+        batch_size=batch_size,
+    )
+
+
+async def asgi_request(app, method: str, path: str, headers=None, body: bytes = b""):
+    """
+    Minimal in-process ASGI HTTP client. Returns (status, body) and the
+    request latency in seconds.
+    """
+    path, _, query = path.partition("?")
+    headers = dict(headers or {})
+    if body:
+        headers["Content-Length"] = str(len(body))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"localhost")]
+        + [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 80),
+    }
+    request_sent = False
+    disconnect = asyncio.Event()
+    response = {"status": None, "body": []}
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    elapsed = time.perf_counter() - start
+    disconnect.set()
+
+    return response["status"], b"".join(response["body"]), elapsed
+
+
+async def load(make_request, total: int, concurrency: int) -> dict:
+    """
+    Runs ``total`` requests with at most ``concurrency`` in flight and reports
+    throughput and latency percentiles.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    statuses = {}
+
+    async def one():
+        async with semaphore:
+            status, _, elapsed = await make_request()
+            statuses[status] = statuses.get(status, 0) + 1
+            return elapsed
+
+    start = time.perf_counter()
+    timings = await asyncio.gather(*[one() for _ in range(total)])
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "requests_per_second": total / elapsed,
+        "statuses": statuses,
+        **summarize(timings),
+    }
+
+
+async def ameasure(fn, repeat: int = 5, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        await fn()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        timings.append(time.perf_counter() - start)
+
+    return summarize(timings)
+
+
+def seed_accounts(prefix: str, users: int, todos: int) -> list[tuple[User, str]]:
+    accounts = [create_user(f"{prefix}-{i}@bench.local") for i in range(users)]
+    for user, _ in accounts:
+        seed_todos(user, todos)
+    return accounts
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    """
+    Maps "path/to/case" to median_ms for every measurement in a result tree.
+    """
+    flat = {}
+    for key, value in results.items():
+        if not isinstance(value, dict):
+            continue
+        path = f"{prefix}/{key}" if prefix else str(key)
+        if "median_ms" in value:
+            flat[path] = value["median_ms"]
+        else:
+            flat.update(flatten(value, path))
+    return flat
+
+
+def compare(baseline: dict, results: dict) -> list[tuple[str, float, float, float]]:
+    old, new = flatten(baseline), flatten(results)
+    return [
+        (path, old[path], new[path], new[path] / old[path] if old[path] else 0.0)
+        for path in sorted(old.keys() & new.keys())
+    ]
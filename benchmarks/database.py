@@ -0,0 +1,133 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import OperationalError, connections, transaction
+from django.utils.timezone import now
+
+from api.models import TokenKey
+from benchmarks.base import summarize
+from core.database import sqlite_init_command
+from todos.models import Todo
+
+READERS = 4
+WRITERS = 2
+SECONDS_PER_REPEAT = 0.5
+
+PROFILES = {
+    # Django's SQLite defaults, a new connection per request
+    "default": {"CONN_MAX_AGE": 0, "OPTIONS": {}},
+    "tuned": {
+        "CONN_MAX_AGE": 60,
+        "OPTIONS": {
+            "init_command": sqlite_init_command(
+                "WAL", "NORMAL", settings.SQLITE_MMAP_SIZE
+            ),
+            "timeout": settings.SQLITE_BUSY_TIMEOUT,
+            "transaction_mode": "IMMEDIATE",
+        },
+    },
+}
+
+
+def _add_database(alias: str, path: str, profile: dict):
+    connections.settings[alias] = {
+        **connections.settings["default"],
+        "NAME": path,
+        "TEST": {"NAME": path},
+        **profile,
+    }
+    call_command("migrate", database=alias, verbosity=0)
+
+
+def _seed(alias: str) -> tuple[int, int]:
+    user = User.objects.db_manager(alias).create_user(
+        username="db@bench.local", email="db@bench.local"
+    )
+    token = TokenKey.objects.using(alias).create(user=user, key="db-bench")
+    Todo.objects.using(alias).bulk_create(
+        [Todo(user=user, name=f"#{i} todo") for i in range(1000)]
+    )
+    return user.id, token.id
+
+
+def _bench(alias: str, user_id: int, token_id: int, seconds: float) -> dict:
+    stop = threading.Event()
+    reads, writes, errors = [], [], []
+
+    def worker(operation, timings):
+        connection = connections[alias]
+        try:
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    operation()
+                    timings.append(time.perf_counter() - start)
+                except OperationalError:
+                    errors.append(1)
+                # Like the end of a request, closes unless persistent
+                connection.close_if_unusable_or_obsolete()
+        finally:
+            connection.close()
+
+    def read():
+        list(
+            Todo.objects.using(alias)
+            .filter(user_id=user_id)
+            .values_list("uid", "name", "done")[:100]
+        )
+
+    def write():
+        # A todo insert and the token's last_used update, as one request
+        with transaction.atomic(using=alias):
+            Todo.objects.using(alias).bulk_create(
+                [Todo(user_id=user_id, name="written")]
+            )
+            TokenKey.objects.using(alias).filter(id=token_id).update(last_used=now())
+
+    threads = [
+        threading.Thread(target=worker, args=(read, reads)) for _ in range(READERS)
+    ] + [threading.Thread(target=worker, args=(write, writes)) for _ in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "reads_per_second": len(reads) / seconds,
+        "writes_per_second": len(writes) / seconds,
+        "errors": len(errors),
+        "read": summarize(reads) if reads else {},
+        "write": summarize(writes) if writes else {},
+    }
+
+
+def run(repeat: int = 5, **options) -> dict:
+    """
+    Read and write throughput on a file backed SQLite database with
+    ``READERS`` reader and ``WRITERS`` writer threads, under Django's
+    defaults and under the tuned profile from core/extended_settings.
+    """
+    if connections["default"].vendor != "sqlite":
+        return {"skipped": "SQLite only"}
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, profile in PROFILES.items():
+            alias = f"bench_{name}"
+            _add_database(alias, os.path.join(directory, f"{name}.db"), profile)
+            try:
+                user_id, token_id = _seed(alias)
+                results[name] = _bench(
+                    alias, user_id, token_id, repeat * SECONDS_PER_REPEAT
+                )
+            finally:
+                connections[alias].close()
+                del connections.settings[alias]
+    return results
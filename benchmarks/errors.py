@@ -0,0 +1,33 @@
+from django.test import Client
+
+from benchmarks.base import create_user, measure, seed_todos
+
+REQUESTS_PER_REPEAT = 100
+
+
+def run(repeat: int = 5, sizes=None, **options) -> dict:
+    """
+    Per-request latency of the error paths (missing todo, invalid token)
+    next to a successful retrieve of the same endpoint.
+    """
+    user, token = create_user("errors@bench.local")
+    todo = seed_todos(user, 1)[0]
+    client = Client(SERVER_NAME="localhost")
+    auth = {"HTTP_AUTHORIZATION": f"bearer {token}"}
+
+    requests = {
+        "retrieve_ok": (f"/api/todos/{todo.uid}/", auth, 200),
+        "not_found": ("/api/todos/000000000000000000000000/", auth, 404),
+        "invalid_token": ("/api/todos/", {"HTTP_AUTHORIZATION": "bearer nope"}, 403),
+        "missing_token": ("/api/todos/", {}, 400),
+    }
+
+    results = {}
+    for name, (path, headers, status) in requests.items():
+        assert client.get(path, **headers).status_code == status, name
+        results[name] = measure(
+            lambda: client.get(path, **headers),
+            repeat=repeat * REQUESTS_PER_REPEAT,
+        )
+
+    return results
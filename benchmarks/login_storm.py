@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+from benchmarks.base import ameasure, asgi_request, create_user, load, seed_todos
+
+REQUESTS_PER_REPEAT = 20
+# Above the default PASSWORD_HASH_MAX_PENDING, so part of each storm is shed
+STORM_CONCURRENCY = 64
+PASSWORD = "All-f0r-1"
+
+
+def run(repeat: int = 5, sizes=None, **options) -> dict:
+    """
+    Todo list latency over ASGI on its own and while a burst of logins hits
+    the sync (DRF) and the async login endpoint, with the right and with a
+    wrong password. Logins beyond the hashing pool's pending limit are
+    answered with 429, see the storm statuses; sync ones that are admitted
+    still hash on the request thread.
+    """
+    from core.asgi import application
+
+    user, token = create_user("storm@bench.local")
+    user.set_password(PASSWORD)
+    user.save()
+    seed_todos(user, 100)
+
+    requests = repeat * REQUESTS_PER_REPEAT
+    right = json.dumps({"email": "storm@bench.local", "password": PASSWORD}).encode()
+    wrong = json.dumps({"email": "storm@bench.local", "password": "wrong"}).encode()
+
+    async def list_todos():
+        status, content, elapsed = await asgi_request(
+            application,
+            "GET",
+            "/api/todos/",
+            headers={"Authorization": f"bearer {token}"},
+        )
+        assert status == 200, (status, content)
+
+    def login(path, body):
+        return lambda: asgi_request(
+            application,
+            "POST",
+            path,
+            headers={"Content-Type": "application/json"},
+            body=body,
+        )
+
+    async def bench():
+        results = {"idle": {"list": await ameasure(list_todos, repeat=requests)}}
+        for name, path, body in [
+            ("sync_login_storm", "/api/accounts/login/", right),
+            ("async_login_storm", "/api/async/accounts/login/", right),
+            ("sync_failed_login_storm", "/api/accounts/login/", wrong),
+            ("async_failed_login_storm", "/api/async/accounts/login/", wrong),
+        ]:
+            storm = asyncio.create_task(
+                load(
+                    login(path, body),
+                    total=requests * 4,
+                    concurrency=STORM_CONCURRENCY,
+                )
+            )
+            # Let the storm fill the pool before measuring
+            await asyncio.sleep(0.05)
+            results[name] = {
+                "list": await ameasure(list_todos, repeat=requests, warmup=0),
+                "logins": await storm,
+            }
+        return results
+
+    return asyncio.run(bench())
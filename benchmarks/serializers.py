@@ -0,0 +1,40 @@
+from rest_framework.renderers import JSONRenderer
+
+from api.serializers.todos import TodoSerializer
+from benchmarks.base import create_user, measure, seed_todos
+from todos.models import Todo
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def run(repeat: int = 5, sizes=None, **options) -> dict:
+    """
+    TodoSerializer(many=True) against the values_list() fast path, both
+    including the query and JSON rendering like TodoAPI.list does.
+    """
+    renderer = JSONRenderer()
+    results = {}
+    for size in sizes or DEFAULT_SIZES:
+        user, _ = create_user(f"serializers-{size}@bench.local")
+        seed_todos(user, size)
+        queryset = Todo.objects.filter(user=user)
+
+        def model_serializer():
+            return renderer.render(TodoSerializer(queryset, many=True).data)
+
+        def fast_path():
+            rows = TodoSerializer.values_queryset(queryset)
+            return renderer.render(TodoSerializer.serialize_values(rows))
+
+        assert model_serializer() == fast_path()
+
+        results[size] = {
+            "model_serializer": measure(model_serializer, repeat=repeat),
+            "fast_path": measure(fast_path, repeat=repeat),
+        }
+        results[size]["speedup"] = (
+            results[size]["model_serializer"]["median_ms"]
+            / results[size]["fast_path"]["median_ms"]
+        )
+
+    return results
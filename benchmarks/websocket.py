@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.test import override_settings
+
+from benchmarks.base import create_user, summarize
+from todos.models import Todo
+
+DEFAULT_SIZES = [1, 10, 50]
+EVENTS_PER_REPEAT = 10
+
+
+def run(repeat: int = 5, sizes=None, **options) -> dict:
+    """
+    Latency from a committed todo write to every socket of the user having
+    received the event, through TodoConsumer and the configured channel
+    layer, for ``size`` sockets per user.
+    """
+    from core.asgi import application
+
+    user, token = create_user("websocket@bench.local")
+    create = database_sync_to_async(Todo.objects.create)
+
+    async def bench(sockets: int) -> dict:
+        communicators = [
+            WebsocketCommunicator(application, f"/ws/todos/?token={token}")
+            for _ in range(sockets)
+        ]
+        for communicator in communicators:
+            connected, _ = await communicator.connect()
+            assert connected
+
+        timings = []
+        for i in range(repeat * EVENTS_PER_REPEAT + 1):
+            start = time.perf_counter()
+            await create(user=user, name=f"#{i} todo")
+            await asyncio.gather(
+                *[
+                    communicator.receive_json_from(timeout=5)
+                    for communicator in communicators
+                ]
+            )
+            timings.append(time.perf_counter() - start)
+
+        for communicator in communicators:
+            await communicator.disconnect()
+        # First event pays for the layer and dispatcher setup
+        return summarize(timings[1:])
+
+    results = {}
+    limits = {
+        "REALTIME_MAX_CONNECTIONS_PER_USER": max(sizes or DEFAULT_SIZES),
+        "REALTIME_MAX_CONNECTIONS_PER_TOKEN": max(sizes or DEFAULT_SIZES),
+    }
+    for size in sizes or DEFAULT_SIZES:
+        results[size] = {}
+        # Without coalescing this is the raw fan-out cost, with the default
+        # window it is what clients actually see
+        for name, window in [("immediate", 0), ("coalesced", None)]:
+            overrides = dict(limits)
+            if window is not None:
+                overrides["REALTIME_COALESCE_WINDOW"] = window
+            with override_settings(**overrides):
+                results[size][name] = asyncio.run(bench(size))
+
+    return results
@@ -0,0 +1,6 @@
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_process_local(cache) -> bool:
+    # Entries only this process can see, or invalidate
+    return isinstance(cache, LocMemCache)
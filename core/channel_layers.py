@@ -0,0 +1,392 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+import weakref
+import zlib
+
+from channels.layers import BaseChannelLayer
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PORT = 6380
+LINE_LIMIT = 2**20
+
+
+def encode(frame: dict) -> bytes:
+    return json.dumps(frame, separators=(",", ":")).encode() + b"\n"
+
+
+def parse_host(host) -> tuple[str, int]:
+    if isinstance(host, (list, tuple)):
+        return host[0], int(host[1])
+
+    name, _, port = host.rpartition(":")
+    if not name:
+        return port, DEFAULT_PORT
+    return name, int(port)
+
+
+def client_of(channel: str) -> str:
+    # Specific channels are named "<prefix>.<client>!<suffix>"
+    return channel.split("!", 1)[0].rsplit(".", 1)[-1]
+
+
+class ChannelBroker:
+    """
+    Minimal message broker for BrokerChannelLayer, speaking JSON lines over
+    TCP. Keeps group memberships and pushes group and channel messages to the
+    connected layer owning each channel. Several brokers can run side by side,
+    layers shard groups across them.
+    """
+
+    def __init__(self, group_expiry=86400, max_buffer=LINE_LIMIT):
+        self.group_expiry = group_expiry
+        self.max_buffer = max_buffer
+        self.server = None
+        self.groups = {}
+        self.clients = {}
+        self.handlers = {}
+        self._stats = {"frames": 0, "deliveries": 0, "dropped": 0}
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self.server = await asyncio.start_server(
+            self._handle, host, port, limit=LINE_LIMIT
+        )
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+        for writer in list(self.handlers.values()):
+            writer.close()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self.handlers[task] = writer
+        client = None
+        try:
+            async for line in reader:
+                frame = json.loads(line)
+                self._stats["frames"] += 1
+                if frame["op"] == "hello":
+                    client = frame["client"]
+                    self.clients[client] = writer
+                else:
+                    self._apply(frame)
+                # Membership changes are acknowledged, so a group_send that
+                # follows them on another connection can't overtake them
+                if "id" in frame:
+                    writer.write(encode({"ack": frame["id"]}))
+        except (ConnectionError, ValueError, KeyError):
+            log.warning("Dropping channel layer client %s", client, exc_info=True)
+        finally:
+            if client is not None and self.clients.get(client) is writer:
+                del self.clients[client]
+                self._forget(client)
+            self.handlers.pop(task, None)
+            writer.close()
+
+    def _apply(self, frame: dict):
+        op = frame["op"]
+        if op == "group_add":
+            self.groups.setdefault(frame["group"], {})[frame["channel"]] = (
+                time.time() + self.group_expiry
+            )
+        elif op == "group_discard":
+            channels = self.groups.get(frame["group"])
+            if channels is not None:
+                channels.pop(frame["channel"], None)
+                if not channels:
+                    del self.groups[frame["group"]]
+        elif op == "group_send":
+            self._deliver(self._group_channels(frame["group"]), frame["message"])
+        elif op == "send":
+            self._deliver([frame["channel"]], frame["message"])
+        elif op == "flush":
+            self.groups.clear()
+
+    def _group_channels(self, group: str) -> list[str]:
+        channels = self.groups.get(group)
+        if not channels:
+            return []
+
+        timestamp = time.time()
+        for channel, expires_at in list(channels.items()):
+            if expires_at < timestamp:
+                del channels[channel]
+        return list(channels)
+
+    def _deliver(self, channels: list[str], message: dict):
+        by_client = {}
+        for channel in channels:
+            by_client.setdefault(client_of(channel), []).append(channel)
+
+        for client, client_channels in by_client.items():
+            writer = self.clients.get(client)
+            if writer is None:
+                continue
+            # Don't let one stalled layer grow the broker's memory unbounded
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                self._stats["dropped"] += len(client_channels)
+                continue
+            writer.write(encode({"channels": client_channels, "message": message}))
+            self._stats["deliveries"] += len(client_channels)
+
+    def _forget(self, client: str):
+        for group, channels in list(self.groups.items()):
+            for channel in [c for c in channels if client_of(c) == client]:
+                del channels[channel]
+            if not channels:
+                del self.groups[group]
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["clients"] = len(self.clients)
+        stats["groups"] = len(self.groups)
+        return stats
+
+
+class _LoopState:
+    def __init__(self):
+        self.client = uuid.uuid4().hex
+        self.writers = {}
+        self.locks = {}
+        self.readers = set()
+        self.reconnects = set()
+        self.pending = {}
+        self.sequence = 0
+        self.queues = {}
+        self.groups = {}
+
+
+class BrokerChannelLayer(BaseChannelLayer):
+    """
+    Channel layer backed by one or more ChannelBroker processes. Groups are
+    sharded across the brokers by a hash of their name, every layer connects
+    to all of them so it receives pushes for its channels from any shard.
+    Messages must be JSON serializable.
+    """
+
+    extensions = ["groups", "flush"]
+
+    def __init__(
+        self,
+        hosts=None,
+        expiry=60,
+        capacity=100,
+        channel_capacity=None,
+        timeout=5,
+        **kwargs,
+    ):
+        super().__init__(
+            expiry=expiry,
+            capacity=capacity,
+            channel_capacity=channel_capacity,
+            **kwargs,
+        )
+        self.hosts = [parse_host(host) for host in hosts or ["127.0.0.1"]]
+        self.timeout = timeout
+        # asyncio streams are bound to their loop, keep a connection set per loop
+        self._states = weakref.WeakKeyDictionary()
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = self._states[loop] = _LoopState()
+        return state
+
+    def _shard(self, name: str) -> int:
+        return zlib.crc32(name.encode()) % len(self.hosts)
+
+    async def _writer(self, state: _LoopState, index: int):
+        writer = state.writers.get(index)
+        if writer is not None and not writer.is_closing():
+            return writer
+
+        lock = state.locks.setdefault(index, asyncio.Lock())
+        async with lock:
+            writer = state.writers.get(index)
+            if writer is not None and not writer.is_closing():
+                return writer
+
+            host, port = self.hosts[index]
+            reader, writer = await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+            task = asyncio.create_task(self._read(state, index, reader))
+            state.readers.add(task)
+            task.add_done_callback(state.readers.discard)
+
+            frames = [{"op": "hello", "client": state.client}]
+            # Memberships live on the broker, put them back after a reconnect
+            for group, channels in state.groups.items():
+                if self._shard(group) == index:
+                    frames += [
+                        {"op": "group_add", "group": group, "channel": channel}
+                        for channel in channels
+                    ]
+            await self._request(state, writer, *frames)
+
+            state.writers[index] = writer
+            return writer
+
+    async def _request(self, state: _LoopState, writer, *frames: dict):
+        # Waits for the broker to apply the frames, which it does in order
+        state.sequence += 1
+        future = state.pending[state.sequence] = (
+            asyncio.get_running_loop().create_future()
+        )
+        frames[-1]["id"] = state.sequence
+        writer.writelines([encode(frame) for frame in frames])
+        try:
+            await asyncio.wait_for(future, self.timeout)
+        finally:
+            state.pending.pop(frames[-1]["id"], None)
+
+    async def _read(self, state: _LoopState, index: int, reader):
+        try:
+            async for line in reader:
+                frame = json.loads(line)
+                if "ack" in frame:
+                    future = state.pending.get(frame["ack"])
+                    if future is not None and not future.done():
+                        future.set_result(None)
+                    continue
+                for channel in frame["channels"]:
+                    self._put(state, channel, frame["message"])
+        except ConnectionError:
+            pass
+        finally:
+            state.writers.pop(index, None)
+
+        if state.groups:
+            # The loop only holds weak references to tasks
+            task = asyncio.create_task(self._reconnect(state, index))
+            state.reconnects.add(task)
+            task.add_done_callback(state.reconnects.discard)
+            task.add_done_callback(self._log_reconnect_failure)
+
+    async def _reconnect(self, state: _LoopState, index: int):
+        delay = 0.1
+        while state.groups:
+            try:
+                await self._writer(state, index)
+                return
+            except OSError:
+                log.warning("Channel broker %s:%s unreachable", *self.hosts[index])
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5)
+
+    def _log_reconnect_failure(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            log.error(
+                "Reconnecting to the channel broker failed", exc_info=task.exception()
+            )
+
+    def _put(self, state: _LoopState, channel: str, message: dict):
+        queue = state.queues.get(channel)
+        if queue is None:
+            queue = state.queues[channel] = asyncio.Queue(
+                maxsize=self.get_capacity(channel)
+            )
+        try:
+            queue.put_nowait(dict(message))
+        except asyncio.QueueFull:
+            log.warning("Channel %s is full, dropping message", channel)
+
+    async def _write(self, index: int, frame: dict):
+        writer = await self._writer(self._state(), index)
+        writer.write(encode(frame))
+        await writer.drain()
+
+    async def _ack(self, index: int, frame: dict):
+        state = self._state()
+        await self._request(state, await self._writer(state, index), frame)
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_channel_name(channel)
+        assert "!" in channel, "only process specific channels are supported"
+
+        state = self._state()
+        if client_of(channel) == state.client:
+            self._put(state, channel, message)
+            return
+
+        await self._write(
+            self._shard(channel), {"op": "send", "channel": channel, "message": message}
+        )
+
+    async def receive(self, channel):
+        self.require_valid_channel_name(channel)
+        state = self._state()
+        queue = state.queues.get(channel)
+        if queue is None:
+            queue = state.queues[channel] = asyncio.Queue(
+                maxsize=self.get_capacity(channel)
+            )
+        try:
+            return await queue.get()
+        finally:
+            if queue.empty():
+                state.queues.pop(channel, None)
+
+    async def new_channel(self, prefix="specific"):
+        state = self._state()
+        channel = f"{prefix}.{state.client}!{uuid.uuid4().hex[:12]}"
+        # Group messages for this channel may come from any shard
+        await asyncio.gather(
+            *[self._writer(state, index) for index in range(len(self.hosts))]
+        )
+        return channel
+
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        self._state().groups.setdefault(group, set()).add(channel)
+        await self._ack(
+            self._shard(group), {"op": "group_add", "group": group, "channel": channel}
+        )
+
+    async def group_discard(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+
+        state = self._state()
+        channels = state.groups.get(group)
+        if channels is not None:
+            channels.discard(channel)
+            if not channels:
+                del state.groups[group]
+
+        await self._ack(
+            self._shard(group),
+            {"op": "group_discard", "group": group, "channel": channel},
+        )
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_group_name(group)
+        await self._write(
+            self._shard(group), {"op": "group_send", "group": group, "message": message}
+        )
+
+    async def flush(self):
+        state = self._state()
+        state.queues.clear()
+        state.groups.clear()
+        for index in range(len(self.hosts)):
+            await self._write(index, {"op": "flush"})
+
+    async def close(self):
+        state = self._states.pop(asyncio.get_running_loop(), None)
+        if state is None:
+            return
+
+        state.queues.clear()
+        for writer in state.writers.values():
+            writer.close()
+        for task in list(state.readers) + list(state.reconnects):
+            task.cancel()
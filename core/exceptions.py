@@ -1,3 +1,6 @@
+from functools import cache
+
+
 class APIException(Exception):
     def __init__(self, code, message):
         self.message = message
@@ -28,3 +31,54 @@ class APIConflict(APIException):
     def __init__(self, code="conflict", message="Conflict."):
         self.message = message
         self.code = code
+
+
+class APIGone(APIException):
+    def __init__(self, code="gone", message="Gone."):
+        self.message = message
+        self.code = code
+
+
+class APIPreconditionFailed(APIException):
+    def __init__(self, code="precondition_failed", message="Precondition failed."):
+        self.message = message
+        self.code = code
+
+
+class APITooManyRequests(APIException):
+    def __init__(self, code="too_many_requests", message="Too many requests."):
+        self.message = message
+        self.code = code
+
+
+class APIServiceUnavailable(APIException):
+    def __init__(self, code="service_unavailable", message="Service unavailable."):
+        self.message = message
+        self.code = code
+
+
+# Response status per exception class, subclasses resolve to their nearest
+# mapped base
+EXCEPTION_STATUSES = {
+    APINotFound: 404,
+    APIForbidden: 403,
+    APIConflict: 409,
+    APIGone: 410,
+    APIPreconditionFailed: 412,
+    APITooManyRequests: 429,
+    APIServiceUnavailable: 503,
+    APIAccessDenied: 400,
+    APIException: 400,
+}
+
+
+@cache
+def _get_status(exception_class):
+    for klass in exception_class.__mro__:
+        if klass in EXCEPTION_STATUSES:
+            return EXCEPTION_STATUSES[klass]
+    return None
+
+
+def get_exception_status(exc) -> int | None:
+    return _get_status(type(exc))
@@ -17,6 +17,21 @@ SOCIALACCOUNT_PROVIDERS = {
         "AUTH_PARAMS": {
             "access_type": "online",
         },
+        # Used by api.social to resolve access tokens sent to google-auth
+        "USERINFO_URL": os.environ.get(
+            "GOOGLE_USERINFO_URL", "https://www.googleapis.com/oauth2/v1/userinfo"
+        ),
+        # ID tokens sent to google-auth are verified locally against these keys
+        "JWKS_URL": os.environ.get(
+            "GOOGLE_JWKS_URL", "https://www.googleapis.com/oauth2/v3/certs"
+        ),
+        "ISSUERS": ["https://accounts.google.com", "accounts.google.com"],
+        # Client ids besides the app's own, e.g. of the mobile apps
+        "ID_TOKEN_AUDIENCES": [
+            audience.strip()
+            for audience in os.environ.get("GOOGLE_ID_TOKEN_AUDIENCES", "").split(",")
+            if audience.strip()
+        ],
     },
     "linkedin_oauth2": {
         "SCOPE": ["r_liteprofile", "r_emailaddress"],
@@ -35,3 +50,23 @@ SOCIALACCOUNT_PROVIDERS = {
         },
     },
 }
+
+# Outbound calls to the providers (api.social), timeouts in seconds
+SOCIAL_HTTP_CONNECT_TIMEOUT = float(os.environ.get("SOCIAL_HTTP_CONNECT_TIMEOUT", 3.05))
+SOCIAL_HTTP_READ_TIMEOUT = float(os.environ.get("SOCIAL_HTTP_READ_TIMEOUT", 5))
+SOCIAL_HTTP_RETRIES = int(os.environ.get("SOCIAL_HTTP_RETRIES", 2))
+SOCIAL_HTTP_POOL_SIZE = int(os.environ.get("SOCIAL_HTTP_POOL_SIZE", 10))
+# Consecutive failures that open the circuit, and how long it stays open
+SOCIAL_HTTP_CIRCUIT_FAILURES = int(os.environ.get("SOCIAL_HTTP_CIRCUIT_FAILURES", 5))
+SOCIAL_HTTP_CIRCUIT_RESET_TIMEOUT = float(
+    os.environ.get("SOCIAL_HTTP_CIRCUIT_RESET_TIMEOUT", 30)
+)
+SOCIAL_USERINFO_CACHE_ALIAS = os.environ.get("SOCIAL_USERINFO_CACHE_ALIAS", "default")
+SOCIAL_USERINFO_CACHE_TTL = int(os.environ.get("SOCIAL_USERINFO_CACHE_TTL", 60))
+# Signing keys of ID token issuers, refetched early for unknown key ids at
+# most once per interval
+SOCIAL_JWKS_TTL = int(os.environ.get("SOCIAL_JWKS_TTL", 3600))
+SOCIAL_JWKS_MIN_REFRESH_INTERVAL = int(
+    os.environ.get("SOCIAL_JWKS_MIN_REFRESH_INTERVAL", 60)
+)
+SOCIAL_JWT_LEEWAY = int(os.environ.get("SOCIAL_JWT_LEEWAY", 30))
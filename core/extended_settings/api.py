@@ -0,0 +1,63 @@
+import os
+
+# Handlers declare their query count with api.base.query_budget, exceeding it
+# is logged, or raises when strict (the test suite runs strict)
+API_QUERY_BUDGET_STRICT = os.environ.get("API_QUERY_BUDGET_STRICT", "false") == "true"
+
+# Share of expected API errors (4xx) that get logged, unexpected ones always are
+API_ERROR_LOG_SAMPLE_RATE = float(os.environ.get("API_ERROR_LOG_SAMPLE_RATE", 0.01))
+
+# Share of API calls written to the api.requests log, overridable per endpoint
+# with "TodoAPI.list=0.5,AccountAPI.*=1"
+API_REQUEST_LOG_SAMPLE_RATE = float(os.environ.get("API_REQUEST_LOG_SAMPLE_RATE", 0.01))
+API_REQUEST_LOG_SAMPLE_RATES = {
+    endpoint.strip(): float(rate)
+    for endpoint, _, rate in (
+        item.partition("=")
+        for item in os.environ.get("API_REQUEST_LOG_SAMPLE_RATES", "").split(",")
+        if item.strip()
+    )
+}
+
+# Password hashing pool used by login/register, past the pending limit
+# (queued and running) requests are answered with 429. Half the cores by
+# default so a login burst leaves CPU for everything else
+PASSWORD_HASH_WORKERS = int(
+    os.environ.get("PASSWORD_HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2))
+)
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", 32))
+
+# Write-behind recorder for TokenKey.last_used, flushed from a background
+# thread. Without it they are only written when the process exits
+TOKEN_ACTIVITY_BACKGROUND_FLUSH = (
+    os.environ.get("TOKEN_ACTIVITY_BACKGROUND_FLUSH", "true") == "true"
+)
+TOKEN_ACTIVITY_MIN_INTERVAL = int(os.environ.get("TOKEN_ACTIVITY_MIN_INTERVAL", 60))
+TOKEN_ACTIVITY_FLUSH_INTERVAL = int(os.environ.get("TOKEN_ACTIVITY_FLUSH_INTERVAL", 30))
+TOKEN_ACTIVITY_BATCH_SIZE = int(os.environ.get("TOKEN_ACTIVITY_BATCH_SIZE", 500))
+
+# Keyset pagination for list endpoints
+TODO_PAGE_SIZE = int(os.environ.get("TODO_PAGE_SIZE", 100))
+TODO_MAX_PAGE_SIZE = int(os.environ.get("TODO_MAX_PAGE_SIZE", 1000))
+
+# Bulk todo operations
+TODO_BULK_MAX_ITEMS = int(os.environ.get("TODO_BULK_MAX_ITEMS", 500))
+
+# Delta sync, tombstones older than this are purged and their cursors expire
+TODO_TOMBSTONE_RETENTION_DAYS = int(os.environ.get("TODO_TOMBSTONE_RETENTION_DAYS", 30))
+# Seconds of history re-read before each changes cursor. Timestamps are taken
+# before commit, so a slow transaction can land behind a cursor already handed
+# out, this has to cover the longest todo write
+TODO_CHANGES_OVERLAP = float(os.environ.get("TODO_CHANGES_OVERLAP", 10))
+
+# Serialize todo lists straight from values_list() instead of TodoSerializer
+TODO_FAST_SERIALIZER = os.environ.get("TODO_FAST_SERIALIZER", "true") == "true"
+
+# Rows fetched per round trip when streaming exports
+TODO_EXPORT_CHUNK_SIZE = int(os.environ.get("TODO_EXPORT_CHUNK_SIZE", 2000))
+
+# Request instrumentation, see core.metrics. /api/metrics/ is readable by
+# superusers and by scrapers sending "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_SERVER_TIMING = os.environ.get("METRICS_SERVER_TIMING", "true") == "true"
+METRICS_SAMPLE_SIZE = int(os.environ.get("METRICS_SAMPLE_SIZE", 1024))
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN") or None
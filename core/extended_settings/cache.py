@@ -0,0 +1,27 @@
+import os
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    },
+}
+
+# Token resolution cache used by TokenKeyAuthentication. TOKEN_CACHE_TTL only
+# applies to a cross-process backend, on locmem it's capped to the local TTL
+TOKEN_CACHE_ENABLED = os.environ.get("TOKEN_CACHE_ENABLED", "true") == "true"
+TOKEN_CACHE_ALIAS = os.environ.get("TOKEN_CACHE_ALIAS", "default")
+TOKEN_CACHE_TTL = int(os.environ.get("TOKEN_CACHE_TTL", 300))
+# The per-process tier can't be invalidated from other processes, keep it short
+TOKEN_CACHE_LOCAL_TTL = int(os.environ.get("TOKEN_CACHE_LOCAL_TTL", 10))
+TOKEN_CACHE_LOCAL_MAXSIZE = int(os.environ.get("TOKEN_CACHE_LOCAL_MAXSIZE", 10000))
+
+# Cached todo list responses, keyed by the generation read from the database
+TODO_CACHE_ALIAS = os.environ.get("TODO_CACHE_ALIAS", "default")
+TODO_LIST_CACHE_ENABLED = os.environ.get("TODO_LIST_CACHE_ENABLED", "true") == "true"
+TODO_LIST_CACHE_TTL = int(os.environ.get("TODO_LIST_CACHE_TTL", 300))
+# Concurrent misses wait this long (seconds) for the one recompute to land
+TODO_LIST_CACHE_LOCK_WAIT = float(os.environ.get("TODO_LIST_CACHE_LOCK_WAIT", 2))
+TODO_LIST_CACHE_LOCK_TIMEOUT = int(os.environ.get("TODO_LIST_CACHE_LOCK_TIMEOUT", 10))
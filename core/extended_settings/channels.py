@@ -1,3 +1,63 @@
-CHANNEL_LAYERS = {
-    "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"},
-}
+import os
+
+# memory only reaches consumers in the same process, use redis or broker once
+# there is more than one worker. Hosts are comma separated, groups are sharded
+# across them by both backends.
+CHANNEL_LAYER_BACKEND = os.environ.get("CHANNEL_LAYER_BACKEND", "memory")
+CHANNEL_LAYER_HOSTS = [
+    host.strip()
+    for host in os.environ.get("CHANNEL_LAYER_HOSTS", "").split(",")
+    if host.strip()
+]
+CHANNEL_LAYER_CAPACITY = int(os.environ.get("CHANNEL_LAYER_CAPACITY", 100))
+
+if CHANNEL_LAYER_BACKEND == "redis":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": CHANNEL_LAYER_HOSTS or ["redis://127.0.0.1:6379"],
+                "capacity": CHANNEL_LAYER_CAPACITY,
+            },
+        },
+    }
+elif CHANNEL_LAYER_BACKEND == "broker":
+    # Pure Python stand-in, start brokers with manage.py run_channel_broker
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "core.channel_layers.BrokerChannelLayer",
+            "CONFIG": {
+                "hosts": CHANNEL_LAYER_HOSTS or ["127.0.0.1:6380"],
+                "capacity": CHANNEL_LAYER_CAPACITY,
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+            "CONFIG": {"capacity": CHANNEL_LAYER_CAPACITY},
+        },
+    }
+
+# Todo events for the same user group within this window (seconds) are merged
+# into one todos_changed frame, 0 sends every event as is
+REALTIME_COALESCE_WINDOW = float(os.environ.get("REALTIME_COALESCE_WINDOW", 0.05))
+
+# Per-socket send queue, full queues either merge pending todo changes
+# (coalesce) or drop the oldest frame (drop_oldest)
+REALTIME_SEND_QUEUE_SIZE = int(os.environ.get("REALTIME_SEND_QUEUE_SIZE", 100))
+REALTIME_SEND_QUEUE_POLICY = os.environ.get("REALTIME_SEND_QUEUE_POLICY", "coalesce")
+
+# Server pings every interval (seconds), sockets silent for interval + timeout
+# are closed
+REALTIME_HEARTBEAT_INTERVAL = float(os.environ.get("REALTIME_HEARTBEAT_INTERVAL", 30))
+REALTIME_HEARTBEAT_TIMEOUT = float(os.environ.get("REALTIME_HEARTBEAT_TIMEOUT", 10))
+
+# Open sockets allowed per process
+REALTIME_MAX_CONNECTIONS_PER_USER = int(
+    os.environ.get("REALTIME_MAX_CONNECTIONS_PER_USER", 20)
+)
+REALTIME_MAX_CONNECTIONS_PER_TOKEN = int(
+    os.environ.get("REALTIME_MAX_CONNECTIONS_PER_TOKEN", 10)
+)
@@ -0,0 +1,51 @@
+import os
+from importlib.util import find_spec
+from pathlib import Path
+
+from django.core.exceptions import ImproperlyConfigured
+
+from core.database import ENGINES, parse_database_url, sqlite_init_command
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+DATABASE_URL = os.environ.get("DATABASE_URL", f"sqlite:///{BASE_DIR / 'db.sqlite3'}")
+# Seconds a connection is reused across requests, 0 closes it after each one.
+# Keep 0 under ASGI (daphne), as Django advises: connections opened from
+# sync_to_async threads outlive the request and aren't cleaned up reliably.
+# Server databases should use DATABASE_POOL (postgres only) instead, which
+# needs persistent connections off
+DATABASE_CONN_MAX_AGE = int(os.environ.get("DATABASE_CONN_MAX_AGE", 0))
+DATABASE_POOL = os.environ.get("DATABASE_POOL", "false") == "true"
+
+# SQLite: WAL lets readers run while a write is in flight and NORMAL sync is
+# durable in WAL mode except on power loss. IMMEDIATE transactions take the
+# write lock up front, so writers wait on busy_timeout instead of failing
+SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT = float(os.environ.get("SQLITE_BUSY_TIMEOUT", 5))
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+SQLITE_TRANSACTION_MODE = os.environ.get("SQLITE_TRANSACTION_MODE", "IMMEDIATE")
+
+DATABASES = {
+    "default": {
+        **parse_database_url(DATABASE_URL),
+        "CONN_MAX_AGE": DATABASE_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": True,
+    }
+}
+
+if DATABASES["default"]["ENGINE"] == ENGINES["sqlite"]:
+    DATABASES["default"]["OPTIONS"] = {
+        "init_command": sqlite_init_command(
+            SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, SQLITE_MMAP_SIZE
+        ),
+        "timeout": SQLITE_BUSY_TIMEOUT,
+        "transaction_mode": SQLITE_TRANSACTION_MODE or None,
+        **DATABASES["default"]["OPTIONS"],
+    }
+elif DATABASE_POOL and DATABASES["default"]["ENGINE"] == ENGINES["postgres"]:
+    # Optional dependency, not in requirements.txt: pip install "psycopg[pool]"
+    if find_spec("psycopg_pool") is None:
+        raise ImproperlyConfigured('DATABASE_POOL needs "psycopg[pool]" installed.')
+    DATABASES["default"]["OPTIONS"].setdefault("pool", True)
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
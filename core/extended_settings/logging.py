@@ -0,0 +1,20 @@
+import os
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "WARNING")
+# JSON lines go to stdout unless a file is set
+LOG_FILE = os.environ.get("LOG_FILE") or None
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "json": {"()": "core.structured_logging.queue_handler", "path": LOG_FILE},
+    },
+    "root": {"handlers": ["json"], "level": LOG_LEVEL},
+    "loggers": {
+        "api.requests": {"handlers": ["json"], "level": "INFO", "propagate": False},
+        # 4xx are in the sampled api.requests lines already, and with DEBUG the
+        # django logger's console handler would print everything a second time
+        "django.request": {"handlers": ["json"], "level": "ERROR", "propagate": False},
+    },
+}
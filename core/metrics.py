@@ -0,0 +1,177 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+_current = ContextVar("request_timings", default=None)
+
+# Not counted as queries, their number depends on transaction nesting
+TRANSACTION_STATEMENTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO", "BEGIN")
+
+
+class RequestTimings:
+    """
+    Phase durations (seconds) and query count of the request being served.
+    Phases can overlap, db time is also part of the phase it ran in.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.queries = 0
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        entries = [
+            f"{phase};dur={seconds * 1000:.2f}"
+            for phase, seconds in self.phases.items()
+        ]
+        entries.append(f'queries;desc="{self.queries}"')
+        return ", ".join(entries)
+
+
+def start_request() -> tuple[RequestTimings, object]:
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current() -> RequestTimings | None:
+    return _current.get()
+
+
+def add_phase(phase: str, seconds: float):
+    timings = _current.get()
+    if timings is not None:
+        timings.add(phase, seconds)
+
+
+@contextmanager
+def timed(phase: str):
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - start)
+
+
+def count_queries(execute, sql, params, many, context):
+    # Installed on every new connection by ApiConfig.ready
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if not sql.startswith(TRANSACTION_STATEMENTS):
+            timings.queries += 1
+        timings.add("db", time.perf_counter() - start)
+
+
+class Summary:
+    def __init__(self, size: int):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.samples.append(value)
+        self.count += 1
+        self.sum += value
+
+    def quantiles(self) -> dict:
+        samples = sorted(self.samples)
+        if not samples:
+            return {}
+        return {
+            q: samples[min(len(samples) - 1, int(len(samples) * q))] for q in QUANTILES
+        }
+
+
+class MetricsRegistry:
+    """
+    Latency summaries per route and phase over the last samples, plus
+    collectors that expose existing stats() dicts as gauges.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._summaries = {}
+        self._queries = {}
+        self._collectors = {}
+
+    def observe(self, route: str, phase: str, seconds: float):
+        with self._lock:
+            summary = self._summaries.get((route, phase))
+            if summary is None:
+                summary = self._summaries[(route, phase)] = Summary(
+                    settings.METRICS_SAMPLE_SIZE
+                )
+            summary.observe(seconds)
+
+    def observe_request(self, route: str, timings: RequestTimings):
+        for phase, seconds in timings.phases.items():
+            self.observe(route, phase, seconds)
+        with self._lock:
+            self._queries[route] = self._queries.get(route, 0) + timings.queries
+
+    def register(self, name: str, collect):
+        self._collectors[name] = collect
+
+    def reset(self):
+        with self._lock:
+            self._summaries.clear()
+            self._queries.clear()
+
+    def render(self) -> str:
+        lines = [
+            "# HELP request_phase_seconds Request phase latency by route.",
+            "# TYPE request_phase_seconds summary",
+        ]
+        with self._lock:
+            summaries = [
+                (key, summary.quantiles(), summary.sum, summary.count)
+                for key, summary in sorted(self._summaries.items())
+            ]
+            queries = sorted(self._queries.items())
+
+        for (route, phase), quantiles, total, count in summaries:
+            labels = f'route="{route}",phase="{phase}"'
+            for q, value in quantiles.items():
+                lines.append(
+                    f'request_phase_seconds{{{labels},quantile="{q}"}} {value:.6f}'
+                )
+            lines.append(f"request_phase_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"request_phase_seconds_count{{{labels}}} {count}")
+
+        lines.append("# TYPE request_queries_total counter")
+        for route, count in queries:
+            lines.append(f'request_queries_total{{route="{route}"}} {count}')
+
+        for name, collect in sorted(self._collectors.items()):
+            for key, value in sorted(collect().items()):
+                if isinstance(value, (int, float)):
+                    lines.append(f"# TYPE {name}_{key} gauge")
+                    lines.append(f"{name}_{key} {float(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,54 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from core import metrics
+
+
+def _route(request) -> str:
+    match = request.resolver_match
+    if match is None:
+        return "unmatched"
+    return f"{request.method} {match.view_name or match.route}"
+
+
+class InstrumentationMiddleware:
+    """
+    Times every request, records its phases per route and reports them in a
+    Server-Timing header. Works without an adapter under both WSGI and ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timings, token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self._finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings, token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        return self._finish(request, response, timings)
+
+    def _finish(self, request, response, timings):
+        timings.add("total", time.perf_counter() - timings.started)
+        metrics.registry.observe_request(_route(request), timings)
+        if settings.METRICS_SERVER_TIMING:
+            response["Server-Timing"] = timings.server_timing()
+        return response
@@ -7,9 +7,7 @@ def set_objectid():
 
 
 class BaseModel(models.Model):
-    uid = models.CharField(
-        default=set_objectid, db_index=True, unique=True, max_length=32
-    )
+    uid = models.CharField(default=set_objectid, unique=True, max_length=32)
     user = models.ForeignKey(
         "auth.User", null=True, blank=True, on_delete=models.SET_NULL
     )
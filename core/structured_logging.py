@@ -0,0 +1,49 @@
+import atexit
+import json
+import logging
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message"}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per line. Anything passed through ``extra`` ends up as a
+    top level key.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(
+            (key, value)
+            for key, value in vars(record).items()
+            if key not in RECORD_ATTRIBUTES
+        )
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+def queue_handler(path=None):
+    """
+    Logging handler factory for dictConfig: records are queued on the calling
+    thread and formatted and written by a background listener.
+    """
+    target = logging.FileHandler(path) if path else logging.StreamHandler(sys.stdout)
+    target.setFormatter(JSONFormatter())
+
+    queue = SimpleQueue()
+    listener = QueueListener(queue, target)
+    listener.start()
+    atexit.register(listener.stop)
+
+    return QueueHandler(queue)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class TodosConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "todos"
+
+    def ready(self):
+        from core.metrics import registry
+        from todos.broadcast import dispatcher
+        from todos.connections import connections
+
+        registry.register("realtime_dispatcher", dispatcher.stats)
+        registry.register("realtime_connections", connections.stats)
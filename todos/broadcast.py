@@ -0,0 +1,208 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+
+from core.metrics import registry
+
+log = logging.getLogger(__name__)
+
+_muted = ContextVar("todos_broadcast_muted", default=False)
+
+# The loops only hold weak references to tasks, these are kept until done
+_tasks = set()
+
+
+def _task_done(task):
+    _tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        log.error("Broadcast task failed", exc_info=task.exception())
+
+
+def _spawn(coro):
+    task = asyncio.ensure_future(coro)
+    _tasks.add(task)
+    task.add_done_callback(_task_done)
+
+
+def merge_changes(previous: dict, current: dict) -> dict:
+    # create+update stays a create, anything followed by a delete is a delete
+    if previous["type"] == "todo_created" and current["type"] == "todo_updated":
+        return {"type": "todo_created", "message": current["message"]}
+    return current
+
+
+class Coalescer:
+    """
+    Buffers todo change events per group for ``window`` seconds and merges
+    the ones that target the same todo into a single todos_changed frame.
+    """
+
+    def __init__(self, send):
+        self._send = send
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stats = {"events": 0, "collapsed": 0, "frames": 0}
+
+    def add(self, group: str, changes: list[dict], window: float):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            schedule = group not in self._pending
+            pending = self._pending.setdefault(group, {})
+            for change in changes:
+                self._stats["events"] += 1
+                uid = change["message"]["id"]
+                if uid in pending:
+                    self._stats["collapsed"] += 1
+                    change = merge_changes(pending[uid], change)
+                pending[uid] = change
+
+        if schedule:
+            loop.call_later(window, self._flush, group)
+
+    def _flush(self, group: str):
+        with self._lock:
+            pending = self._pending.pop(group, None)
+            if not pending:
+                return
+            self._stats["frames"] += 1
+
+        event = {
+            "type": "todos_changed",
+            "message": {"changes": list(pending.values())},
+        }
+        _spawn(self._send(group, event))
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending_groups"] = len(self._pending)
+        return stats
+
+
+class Dispatcher:
+    """
+    Hands group sends to an event loop without blocking the caller. Sends go
+    to the server loop once a consumer has attached it, which keeps the
+    in-memory channel layer on a single loop, and otherwise to a dedicated
+    background loop thread.
+    """
+
+    def __init__(self):
+        self._attached = None
+        self._loop = None
+        self._lock = threading.Lock()
+        self.coalescer = Coalescer(send=self._send)
+
+    def attach(self, loop):
+        self._attached = loop
+
+    def _background_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever,
+                    name="todos-broadcast",
+                    daemon=True,
+                ).start()
+            return self._loop
+
+    def _get_loop(self):
+        loop = self._attached
+        if loop is not None and loop.is_running():
+            return loop
+        return self._background_loop()
+
+    async def _send(self, group: str, event: dict):
+        start = time.perf_counter()
+        try:
+            await get_channel_layer().group_send(group, event)
+        except Exception:
+            log.exception("Failed to broadcast %s to %s", event.get("type"), group)
+        registry.observe("channel_layer", "group_send", time.perf_counter() - start)
+
+    def _dispatch(self, group: str, event: dict):
+        window = settings.REALTIME_COALESCE_WINDOW
+        if window <= 0:
+            _spawn(self._send(group, event))
+        elif event["type"] == "todos_changed":
+            self.coalescer.add(group, event["message"]["changes"], window)
+        else:
+            self.coalescer.add(group, [event], window)
+
+    def submit(self, group: str, event: dict):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = self._get_loop()
+        loop.call_soon_threadsafe(self._dispatch, group, event)
+
+    def stats(self) -> dict:
+        return self.coalescer.stats()
+
+
+dispatcher = Dispatcher()
+
+
+def user_group_name(user_id) -> str:
+    return f"todos.user.{user_id}"
+
+
+def todo_payload(instance) -> dict:
+    return {
+        "id": instance.uid,
+        "name": instance.name,
+        "description": instance.description,
+        "done": instance.done,
+    }
+
+
+def change_event(event_type: str, instance) -> dict:
+    if event_type == "todo_deleted":
+        return {"type": event_type, "message": {"id": instance.uid}}
+    return {"type": event_type, "message": todo_payload(instance)}
+
+
+@contextmanager
+def muted():
+    # Silences the per-instance signal side effects (broadcasts, tombstones)
+    # for bulk operations that take care of them in one go
+    token = _muted.set(True)
+    try:
+        yield
+    finally:
+        _muted.reset(token)
+
+
+def is_muted() -> bool:
+    return _muted.get()
+
+
+def send(group: str, event: dict):
+    # Only broadcast writes that actually commit
+    transaction.on_commit(partial(dispatcher.submit, group, event), robust=True)
+
+
+def send_to_user(user_id, event: dict):
+    send(user_group_name(user_id), event)
+
+
+def send_changes(user_id, changes: list[dict]):
+    if not changes:
+        return
+
+    send_to_user(
+        user_id,
+        {
+            "type": "todos_changed",
+            "message": {"changes": changes},
+        },
+    )
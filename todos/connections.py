@@ -0,0 +1,131 @@
+import asyncio
+import threading
+from collections import Counter, deque
+
+from todos.broadcast import merge_changes
+
+CHANGE_TYPES = {"todo_created", "todo_updated", "todo_deleted", "todos_changed"}
+
+
+def coalesce_frames(frames) -> list[dict]:
+    # Folds every pending todo change into one todos_changed frame, other
+    # frames (pings, pongs) keep their place
+    merged = {}
+    others = []
+    for frame in frames:
+        if frame["type"] not in CHANGE_TYPES:
+            others.append(frame)
+            continue
+
+        if frame["type"] == "todos_changed":
+            changes = frame["data"]["changes"]
+        else:
+            changes = [{"type": frame["type"], "message": frame["data"]}]
+
+        for change in changes:
+            uid = change["message"]["id"]
+            merged[uid] = (
+                merge_changes(merged[uid], change) if uid in merged else change
+            )
+
+    if merged:
+        others.append(
+            {"type": "todos_changed", "data": {"changes": list(merged.values())}}
+        )
+    return others
+
+
+class Outbox:
+    """
+    Bounded per-connection send queue drained by the consumer's writer task.
+    When full, the ``coalesce`` policy merges pending todo changes into one
+    frame and falls back to ``drop_oldest`` when that doesn't free a slot.
+    """
+
+    def __init__(self, maxsize: int, policy: str, registry=None):
+        self.maxsize = maxsize
+        self.policy = policy
+        self.registry = registry
+        self.dropped = 0
+        self._frames = deque()
+        self._ready = asyncio.Event()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def put(self, frame: dict):
+        if len(self._frames) >= self.maxsize and self.policy == "coalesce":
+            before = len(self._frames)
+            self._frames = deque(coalesce_frames(self._frames))
+            self._incr("coalesced", before - len(self._frames))
+
+        if len(self._frames) >= self.maxsize:
+            self._frames.popleft()
+            self.dropped += 1
+            self._incr("dropped")
+
+        self._frames.append(frame)
+        self._ready.set()
+
+    async def get(self) -> dict:
+        while not self._frames:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._frames.popleft()
+
+    def _incr(self, stat: str, count: int = 1):
+        if self.registry is not None and count:
+            self.registry.incr(stat, count)
+
+
+class ConnectionRegistry:
+    """
+    Per-process bookkeeping of open todo sockets, used to enforce connection
+    limits and to report gauges.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._consumers = set()
+        self._by_user = Counter()
+        self._by_token = Counter()
+        self._stats = {"rejected": 0, "dropped": 0, "coalesced": 0, "reaped": 0}
+
+    def register(self, consumer, user_id, token_id, max_user, max_token) -> bool:
+        with self._lock:
+            if self._by_user[user_id] >= max_user or (
+                self._by_token[token_id] >= max_token
+            ):
+                self._stats["rejected"] += 1
+                return False
+
+            self._consumers.add(consumer)
+            self._by_user[user_id] += 1
+            self._by_token[token_id] += 1
+            return True
+
+    def unregister(self, consumer, user_id, token_id):
+        with self._lock:
+            self._consumers.discard(consumer)
+            for counter, key in [(self._by_user, user_id), (self._by_token, token_id)]:
+                counter[key] -= 1
+                if counter[key] <= 0:
+                    del counter[key]
+
+    def incr(self, stat: str, count: int = 1):
+        with self._lock:
+            self._stats[stat] += count
+
+    def stats(self) -> dict:
+        with self._lock:
+            depths = [len(consumer.outbox) for consumer in self._consumers]
+            stats = dict(self._stats)
+            stats["open"] = len(self._consumers)
+            stats["users"] = len(self._by_user)
+
+        stats["queue_depth"] = sum(depths)
+        stats["max_queue_depth"] = max(depths, default=0)
+        return stats
+
+
+connections = ConnectionRegistry()
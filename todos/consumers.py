@@ -1,16 +1,144 @@
-import json
+import asyncio
+import time
+from urllib.parse import parse_qs
 
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.methods import get_user_by_token_key
+from todos import broadcast
+from todos.connections import Outbox, connections
+
+SUBPROTOCOL = "bearer"
+
+
+# Close code for sockets that stopped answering heartbeats
+CLOSE_TIMEOUT = 4008
 
 
 class TodoConsumer(AsyncJsonWebsocketConsumer):
+    group_name = None
+    registered = None
+    outbox = None
+    tasks = ()
+
+    def _get_token_key(self):
+        # Browsers can't set headers on a websocket, so the key comes either
+        # from ``?token=`` or from the ``["bearer", <key>]`` subprotocols
+        subprotocols = self.scope.get("subprotocols") or []
+        if SUBPROTOCOL in subprotocols:
+            index = subprotocols.index(SUBPROTOCOL)
+            if index + 1 < len(subprotocols):
+                return subprotocols[index + 1], SUBPROTOCOL
+
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        return (query.get("token") or [None])[0], None
+
+    @database_sync_to_async
+    def _authenticate(self, key):
+        if not key:
+            return None, None
+
+        try:
+            return get_user_by_token_key(key=key)
+        except AuthenticationFailed:
+            return None, None
+
     async def connect(self):
-        await self.accept()
+        key, subprotocol = self._get_token_key()
+        user, token_key = await self._authenticate(key)
+        # Closing before accepting rejects the handshake
+        if not user or not user.is_active:
+            await self.close()
+            return
+
+        registered = (user.id, token_key.id)
+        if not connections.register(
+            self,
+            *registered,
+            max_user=settings.REALTIME_MAX_CONNECTIONS_PER_USER,
+            max_token=settings.REALTIME_MAX_CONNECTIONS_PER_TOKEN,
+        ):
+            await self.close()
+            return
+
+        self.registered = registered
+        self.scope["user"] = user
+        self.outbox = Outbox(
+            settings.REALTIME_SEND_QUEUE_SIZE,
+            settings.REALTIME_SEND_QUEUE_POLICY,
+            registry=connections,
+        )
+        self.last_seen = time.monotonic()
+
+        broadcast.dispatcher.attach(asyncio.get_running_loop())
+        self.group_name = broadcast.user_group_name(user.id)
+        try:
+            await self.channel_layer.group_add(self.group_name, self.channel_name)
+            await self.accept(subprotocol=subprotocol)
+        except BaseException:
+            # disconnect() never runs for a failed connect, free the slot here
+            connections.unregister(self, *registered)
+            self.registered = None
+            raise
+        self.tasks = [
+            asyncio.create_task(self._write()),
+            asyncio.create_task(self._heartbeat()),
+        ]
 
     async def disconnect(self, close_code):
-        pass
+        for task in self.tasks:
+            task.cancel()
+        if self.registered:
+            connections.unregister(self, *self.registered)
+            self.registered = None
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    @classmethod
+    async def decode_json(cls, text_data):
+        try:
+            return await super().decode_json(text_data)
+        except ValueError:
+            return None
+
+    async def receive_json(self, content, **kwargs):
+        # Any frame proves the client is alive, pongs only exist for that
+        self.last_seen = time.monotonic()
+        if not isinstance(content, dict):
+            self.outbox.put(
+                {
+                    "type": "error",
+                    "code": "invalid_frame",
+                    "message": "Expected a JSON object.",
+                }
+            )
+        elif content.get("type") == "ping":
+            self.outbox.put({"type": "pong"})
+
+    async def _write(self):
+        # Layer events only enqueue, so a slow socket never backs up the
+        # channel layer's queue for this channel
+        while True:
+            await self.send_json(await self.outbox.get())
+
+    async def _heartbeat(self):
+        interval = settings.REALTIME_HEARTBEAT_INTERVAL
+        timeout = settings.REALTIME_HEARTBEAT_TIMEOUT
+        while True:
+            await asyncio.sleep(interval)
+            if time.monotonic() - self.last_seen > interval + timeout:
+                connections.incr("reaped")
+                await self.close(code=CLOSE_TIMEOUT)
+                return
+            self.outbox.put({"type": "ping"})
+
+    async def _forward(self, event):
+        self.outbox.put({"type": event["type"], "data": event["message"]})
 
-    async def receive(self, text_data):
-        text_data_json = json.loads(text_data)
-        message = text_data_json["message"]
-        await self.send(text_data=json.dumps({"message": message}))
+    todo_created = _forward
+    todo_updated = _forward
+    todo_deleted = _forward
+    todos_changed = _forward
@@ -0,0 +1,17 @@
+from todos.models import TodoGeneration
+
+
+def generation_queryset(user_id):
+    return TodoGeneration.objects.filter(user_id=user_id).values_list(
+        "created_on", "value"
+    )
+
+
+def get_generation(user_id) -> str:
+    """
+    Version of the user's todo list, read from the database so every worker
+    agrees on it. Writes bump it in their own transaction, see
+    TodoGeneration. One primary key lookup.
+    """
+    generation = generation_queryset(user_id).first()
+    return ":".join(str(part) for part in generation or ())
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from todos.models import TodoTombstone
+
+
+class Command(BaseCommand):
+    help = "Delete todo tombstones older than the delta sync retention window."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.TODO_TOMBSTONE_RETENTION_DAYS,
+            help="Retention in days, defaults to TODO_TOMBSTONE_RETENTION_DAYS.",
+        )
+
+    def handle(self, *args, **options):
+        deleted = TodoTombstone.purge(
+            older_than=now() - timedelta(days=options["days"])
+        )
+        self.stdout.write(f"Purged {deleted} tombstone(s).")
@@ -0,0 +1,25 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from core.channel_layers import DEFAULT_PORT, ChannelBroker
+
+
+class Command(BaseCommand):
+    help = "Run a channel broker for the broker channel layer backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+
+    def handle(self, *args, **options):
+        try:
+            asyncio.run(self.serve(options["host"], options["port"]))
+        except KeyboardInterrupt:
+            pass
+
+    async def serve(self, host, port):
+        broker = ChannelBroker()
+        host, port = await broker.start(host, port)
+        self.stdout.write(f"Channel broker listening on {host}:{port}")
+        await broker.server.serve_forever()
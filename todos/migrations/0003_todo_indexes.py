@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+import core.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todos", "0002_todotombstone"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # uid is unique, which already indexes it, so dropping db_index
+        # changes no schema and doesn't need SQLite's table rebuild
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name="todo",
+                    name="uid",
+                    field=models.CharField(
+                        default=core.models.set_objectid, max_length=32, unique=True
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="todotombstone",
+                    name="uid",
+                    field=models.CharField(
+                        default=core.models.set_objectid, max_length=32, unique=True
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="todo",
+            index=models.Index(fields=["user", "-uid"], name="todos_todo_user_uid_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="todo",
+            index=models.Index(
+                fields=["user", "updated_on"], name="todos_todo_user_updated_idx"
+            ),
+        ),
+    ]
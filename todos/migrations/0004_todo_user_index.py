@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# The ForeignKey indexes db_index=False drops, the composite indexes lead
+# with user_id so they serve the same lookups
+FK_INDEXES = [
+    ("todos_todo", "todos_todo_user_id_cbda3499"),
+    ("todos_todotombstone", "todos_todotombstone_user_id_55a11871"),
+]
+
+
+def drop_fk_indexes(apps, schema_editor):
+    quote = schema_editor.quote_name
+    for table, name in FK_INDEXES:
+        schema_editor.execute(
+            schema_editor.sql_delete_index
+            % {"table": quote(table), "name": quote(name)}
+        )
+
+
+def create_fk_indexes(apps, schema_editor):
+    quote = schema_editor.quote_name
+    for table, name in FK_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX {quote(name)} ON {quote(table)} ({quote('user_id')})"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todos", "0003_todo_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # An AlterField would rebuild both tables on SQLite, only the index
+        # actually changes
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(drop_fk_indexes, create_fk_indexes),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="todo",
+                    name="user",
+                    field=models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="todotombstone",
+                    name="user",
+                    field=models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+    ]
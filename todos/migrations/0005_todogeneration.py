@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_generations(apps, schema_editor):
+    User = apps.get_model("auth", "User")
+    TodoGeneration = apps.get_model("todos", "TodoGeneration")
+    TodoGeneration.objects.bulk_create(
+        [
+            TodoGeneration(user_id=pk)
+            for pk in User.objects.values_list("pk", flat=True)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("todos", "0004_todo_user_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TodoGeneration",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("value", models.PositiveBigIntegerField(default=0)),
+                ("created_on", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(create_generations, migrations.RunPython.noop),
+    ]
@@ -1,48 +1,110 @@
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from django.conf import settings
 from django.db import models
+from django.db.models import F
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from core.metrics import timed
 from core.models import BaseModel
+from todos import broadcast
 
 
 class Todo(BaseModel):
+    # The composite indexes below lead with user, so no index of its own
+    user = models.ForeignKey(
+        "auth.User", null=True, blank=True, on_delete=models.SET_NULL, db_index=False
+    )
     name = models.CharField(max_length=30)
     description = models.TextField(blank=True, null=True)
     done = models.BooleanField(default=False)
 
+    class Meta(BaseModel.Meta):
+        indexes = [
+            # Lists and their cursor pages, in the default -uid order
+            models.Index(fields=["user", "-uid"], name="todos_todo_user_uid_idx"),
+            # Delta sync, TodoAPI.changes
+            models.Index(
+                fields=["user", "updated_on"], name="todos_todo_user_updated_idx"
+            ),
+        ]
+
     def __str__(self) -> str:
         done = "Done" if self.done else "Not finished"
         return f"Todo: {self.name} | {done}"
 
 
+class TodoTombstone(BaseModel):
+    user = models.ForeignKey(
+        "auth.User", null=True, blank=True, on_delete=models.SET_NULL, db_index=False
+    )
+    todo_uid = models.CharField(max_length=32)
+
+    class Meta(BaseModel.Meta):
+        indexes = [models.Index(fields=["user", "created_on"])]
+
+    def __str__(self) -> str:
+        return f"Deleted todo: {self.todo_uid}"
+
+    @classmethod
+    def purge(cls, older_than) -> int:
+        deleted, _ = cls.objects.filter(created_on__lt=older_than).delete()
+        return deleted
+
+
+class TodoGeneration(models.Model):
+    """
+    Version of a user's todo list, bumped in the transaction of every write
+    to it, so it moves exactly when the write commits. List ETags and cached
+    list responses are keyed by it, see todos.generations.
+    """
+
+    user = models.OneToOneField("auth.User", primary_key=True, on_delete=models.CASCADE)
+    value = models.PositiveBigIntegerField(default=0)
+    # Tells counters apart that started over, e.g. for a reused user id
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"Todo generation: {self.value}"
+
+    @classmethod
+    def bump(cls, user_id):
+        if cls.objects.filter(user_id=user_id).update(value=F("value") + 1):
+            return
+
+        # Users that were created without their row, e.g. loaded from fixtures
+        cls.objects.get_or_create(user_id=user_id)
+        cls.objects.filter(user_id=user_id).update(value=F("value") + 1)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_generation(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        TodoGeneration.objects.create(user=instance)
+
+
+# Muted writers (TodoAPI.bulk) bump the generation once for the whole batch
 @receiver(post_save, sender=Todo)
 def send_update_message(sender, instance, created, **kwargs):
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        instance.uid,
-        {
-            "type": f"todo_{'created' if created else 'updated'}",
-            "message": {
-                "id": instance.uid,
-                "name": instance.name,
-                "description": instance.description,
-                "done": instance.done,
-            },
-        },
-    )
+    if broadcast.is_muted() or not instance.user_id:
+        return
+
+    with timed("signals"):
+        TodoGeneration.bump(instance.user_id)
+        event_type = "todo_created" if created else "todo_updated"
+        broadcast.send_to_user(
+            instance.user_id, broadcast.change_event(event_type, instance)
+        )
 
 
 @receiver(post_delete, sender=Todo)
 def send_delete_message(sender, instance, **kwargs):
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        instance.uid,
-        {
-            "type": "todo_deleted",
-            "message": {
-                "id": instance.uid,
-            },
-        },
-    )
+    if broadcast.is_muted() or not instance.user_id:
+        return
+
+    with timed("signals"):
+        TodoGeneration.bump(instance.user_id)
+        # Lets clients that were offline catch up on deletes, see TodoAPI.changes
+        TodoTombstone.objects.create(user_id=instance.user_id, todo_uid=instance.uid)
+        broadcast.send_to_user(
+            instance.user_id, broadcast.change_event("todo_deleted", instance)
+        )